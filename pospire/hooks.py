@@ -96,16 +96,170 @@ doc_events = {
 		"validate": "pospire.pospire.api.invoice.validate",
 		"before_submit": "pospire.pospire.api.invoice.before_submit",
 		"before_cancel": "pospire.pospire.api.invoice.before_cancel",
+		"on_cancel": "pospire.pospire.api.loyalty.on_invoice_cancel",
+		"on_trash": "pospire.pospire.api.loyalty.on_invoice_cancel",
+	},
+	"Loyalty Point Entry": {
+		"after_insert": "pospire.pospire.api.loyalty.on_loyalty_point_entry_insert",
+		"on_trash": "pospire.pospire.api.loyalty.on_loyalty_point_entry_trash",
 	},
 	"Customer": {
 		"validate": "pospire.pospire.api.customer.validate",
 		"after_insert": "pospire.pospire.api.customer.after_insert",
+		"on_update": [
+			"pospire.pospire.api.cache.on_change",
+			"pospire.pospire.api.customer_search.on_customer_update",
+		],
+		"on_trash": [
+			"pospire.pospire.api.cache.on_change",
+			"pospire.pospire.api.customer_search.on_customer_trash",
+		],
+		"after_rename": [
+			"pospire.pospire.api.cache.on_change",
+			"pospire.pospire.api.customer_search.on_customer_rename",
+		],
+	},
+	"Customer Group": {
+		"on_update": "pospire.pospire.api.cache.on_change",
+		"on_trash": "pospire.pospire.api.cache.on_change",
+	},
+	"Item": {
+		"on_update": [
+			"pospire.pospire.api.item_search.on_item_update",
+			"pospire.pospire.api.scan.on_item_update",
+			"pospire.pospire.api.variant.on_item_update",
+			"pospire.pospire.api.cache.on_change",
+		],
+		"on_trash": [
+			"pospire.pospire.api.item_search.on_item_trash",
+			"pospire.pospire.api.scan.on_item_trash",
+			"pospire.pospire.api.variant.on_item_trash",
+			"pospire.pospire.api.cache.on_change",
+		],
+		"after_rename": [
+			"pospire.pospire.api.item_search.on_item_rename",
+			"pospire.pospire.api.scan.on_item_rename",
+			"pospire.pospire.api.variant.on_item_rename",
+			"pospire.pospire.api.item_price.on_item_rename",
+			"pospire.pospire.api.cache.on_change",
+		],
+	},
+	"Item Attribute": {
+		"on_update": [
+			"pospire.pospire.api.variant.on_item_attribute_update",
+			"pospire.pospire.api.cache.on_change",
+		],
+		"on_trash": [
+			"pospire.pospire.api.variant.on_item_attribute_trash",
+			"pospire.pospire.api.cache.on_change",
+		],
+	},
+	"Item Price": {
+		"on_update": [
+			"pospire.pospire.api.item_price.on_item_price_change",
+			"pospire.pospire.api.cache.on_change",
+		],
+		"on_trash": [
+			"pospire.pospire.api.item_price.on_item_price_change",
+			"pospire.pospire.api.cache.on_change",
+		],
+	},
+	"Item Group": {
+		"on_update": [
+			"pospire.pospire.api.cache.on_change",
+			"pospire.pospire.api.item_group.on_item_group_change",
+		],
+		"on_trash": [
+			"pospire.pospire.api.cache.on_change",
+			"pospire.pospire.api.item_group.on_item_group_change",
+		],
+		"after_rename": [
+			"pospire.pospire.api.cache.on_change",
+			"pospire.pospire.api.item_group.on_item_group_change",
+		],
+	},
+	"POS Profile": {
+		"on_update": [
+			"pospire.pospire.api.cache.on_change",
+			"pospire.pospire.api.item_group.on_pos_profile_update",
+			"pospire.pospire.api.profile_mapping.on_pos_profile_change",
+		],
+		"on_trash": "pospire.pospire.api.profile_mapping.on_pos_profile_change",
+	},
+	"Custom Field": {
+		"on_update": "pospire.pospire.api.profile_mapping.on_field_change",
+		"on_trash": "pospire.pospire.api.profile_mapping.on_field_change",
+	},
+	"Property Setter": {
+		"on_update": "pospire.pospire.api.profile_mapping.on_field_change",
+		"on_trash": "pospire.pospire.api.profile_mapping.on_field_change",
+	},
+	"Accounting Dimension": {
+		"on_update": "pospire.pospire.api.profile_mapping.on_field_change",
+		"on_trash": "pospire.pospire.api.profile_mapping.on_field_change",
+	},
+	"POS Offer": {
+		"on_update": "pospire.pospire.api.cache.on_change",
+		"on_trash": "pospire.pospire.api.cache.on_change",
+	},
+	"Price List": {
+		"on_update": [
+			"pospire.pospire.api.item_price.on_price_list_update",
+			"pospire.pospire.api.cache.on_change",
+		],
+	},
+	"Serial No": {
+		"on_update": [
+			"pospire.pospire.api.scan.on_serial_no_update",
+			"pospire.pospire.api.cache.on_change",
+		],
+		"on_trash": [
+			"pospire.pospire.api.scan.on_serial_no_trash",
+			"pospire.pospire.api.cache.on_change",
+		],
+	},
+	"Batch": {
+		"on_update": [
+			"pospire.pospire.api.scan.on_batch_update",
+			"pospire.pospire.api.batch.on_batch_change",
+			"pospire.pospire.api.cache.on_change",
+		],
+		"on_trash": [
+			"pospire.pospire.api.scan.on_batch_trash",
+			"pospire.pospire.api.batch.on_batch_change",
+			"pospire.pospire.api.cache.on_change",
+		],
+	},
+	"Stock Ledger Entry": {
+		"on_submit": [
+			"pospire.pospire.api.stock.on_stock_ledger_entry_submit",
+			"pospire.pospire.api.batch.on_stock_ledger_entry_submit",
+			"pospire.pospire.api.cache.on_change",
+		],
+	},
+	"Sales Person": {
+		"on_update": "pospire.pospire.api.cache.on_change",
+		"on_trash": "pospire.pospire.api.cache.on_change",
+		"after_rename": "pospire.pospire.api.cache.on_change",
 	},
 }
 
 # Scheduled Tasks
 # ---------------
 
+default_log_clearing_doctypes = {
+	"POS Request Log": 30,
+}
+
+scheduler_events = {
+	"cron": {
+		# warm POS caches ahead of store opening
+		"0 6 * * *": ["pospire.pospire.api.warmup.warm_active_profiles"],
+		# retry queued invoice submissions whose backoff has passed
+		"* * * * *": ["pospire.pospire.api.submission_queue.process_due_entries"],
+	},
+}
+
 # scheduler_events = {
 # 	"all": [
 # 		"pospire.tasks.all"
@@ -0,0 +1,114 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Batch availability for POS.
+
+Sellable batches (enabled, not expired, positive quantity in the warehouse)
+are read for a whole set of items in one grouped query. Results can
+optionally be kept in Redis per item and warehouse; entries are dropped once
+a Stock Ledger Entry for the same item and warehouse commits, or when one of
+the item's batches changes.
+"""
+
+import pickle
+
+import frappe
+from frappe.utils import nowdate
+
+from pospire.pospire.api.stock import STOCK_CACHE_TTL
+
+
+def get_batch_availability(items, warehouse, use_cache=False):
+	"""Return `{item_code: [{batch_no, batch_qty, expiry_date, batch_price, manufacturing_date}]}`.
+
+	Quantities are summed from Serial and Batch Bundle entries, falling back to
+	the legacy `batch_no` column on Stock Ledger Entry for older postings.
+	Batches are listed oldest first.
+	"""
+	items = list(set(items or []))
+	if not items or not warehouse:
+		return {}
+
+	batches = {}
+	missing = items
+	if use_cache:
+		batches = get_cached_batches(items, warehouse)
+		missing = [d for d in items if d not in batches]
+
+	if missing:
+		fetched = {item_code: [] for item_code in missing}
+		for row in frappe.db.sql(
+			"""
+			SELECT
+				sle.item_code,
+				batch.name AS batch_no,
+				SUM(IFNULL(sbe.qty, sle.actual_qty)) AS batch_qty,
+				batch.expiry_date,
+				batch.posa_batch_price AS batch_price,
+				batch.manufacturing_date
+			FROM
+				`tabStock Ledger Entry` sle
+			LEFT JOIN
+				`tabSerial and Batch Entry` sbe
+					ON sbe.parent = sle.serial_and_batch_bundle
+			INNER JOIN
+				`tabBatch` batch
+					ON batch.name = IFNULL(sbe.batch_no, sle.batch_no)
+			WHERE
+				sle.is_cancelled = 0
+				AND sle.warehouse = %(warehouse)s
+				AND sle.item_code IN %(items)s
+				AND batch.disabled = 0
+				AND (batch.expiry_date IS NULL OR batch.expiry_date > %(today)s)
+			GROUP BY
+				sle.item_code, batch.name
+			HAVING
+				batch_qty > 0
+			ORDER BY
+				batch.creation ASC
+			""",
+			{"warehouse": warehouse, "items": tuple(missing), "today": nowdate()},
+			as_dict=1,
+		):
+			fetched[row.pop("item_code")].append(row)
+		if use_cache:
+			set_cached_batches(fetched, warehouse)
+		batches.update(fetched)
+
+	return {item_code: rows for item_code, rows in batches.items() if rows}
+
+
+def get_batch_cache_key(item_code, warehouse):
+	return frappe.cache().make_key(f"pospire_batch_qty|{item_code}|{warehouse}")
+
+
+def get_cached_batches(items, warehouse):
+	values = frappe.cache().mget([get_batch_cache_key(d, warehouse) for d in items])
+	return {
+		item_code: pickle.loads(value)
+		for item_code, value in zip(items, values, strict=True)
+		if value is not None
+	}
+
+
+def set_cached_batches(batches, warehouse):
+	pipeline = frappe.cache().pipeline()
+	for item_code, rows in batches.items():
+		pipeline.set(get_batch_cache_key(item_code, warehouse), pickle.dumps(rows), ex=STOCK_CACHE_TTL)
+	pipeline.execute()
+
+
+def clear_batch_cache(item_code, warehouse=None):
+	if warehouse:
+		frappe.cache().delete(get_batch_cache_key(item_code, warehouse))
+	else:
+		frappe.cache().delete_keys(f"pospire_batch_qty|{item_code}|")
+
+
+def on_stock_ledger_entry_submit(doc, method):
+	if doc.has_batch_no or doc.batch_no:
+		frappe.db.after_commit.add(lambda: clear_batch_cache(doc.item_code, doc.warehouse))
+
+
+def on_batch_change(doc, method):
+	frappe.db.after_commit.add(lambda: clear_batch_cache(doc.item))
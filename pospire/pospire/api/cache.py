@@ -0,0 +1,122 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Server cache for POS datasets.
+
+Entries are keyed on a fingerprint of only the POS Profile fields (and
+arguments) that affect a dataset, so terminals sharing a profile share hits
+regardless of how the client serialised the profile. Each dataset carries a
+version counter that doc events bump after commit; bumping the version
+retires every entry of that dataset at once, so TTLs can be long without
+serving stale data.
+
+Stock is never part of a cached entry: callers overlay Bin quantities,
+serials and batches on every request, so stock postings do not churn the
+cache.
+
+The same counters give clients a version token per dataset, so an endpoint
+can answer "not modified" without building or hashing its payload.
+"""
+
+import hashlib
+import json
+
+import frappe
+
+CACHE_PREFIX = "pospire_cache|"
+
+# POS Profile fields each dataset depends on
+PROFILE_FIELDS = {
+	"items": (
+		"name",
+		"currency",
+		"selling_price_list",
+		"posa_show_template_items",
+		"pose_use_limit_search",
+		"posa_search_limit",
+	),
+	"customers": ("name", "customer_groups"),
+	"items_details": (),
+	"offers": ("name", "company", "warehouse"),
+}
+
+# Doc events that invalidate each dataset
+DATASET_DOCTYPES = {
+	"items": (
+		"Item",
+		"Item Attribute",
+		"Item Price",
+		"Price List",
+		"Item Group",
+		"POS Profile",
+	),
+	"customers": ("Customer", "Customer Group", "POS Profile"),
+	"items_details": ("Item",),
+	"offers": ("POS Offer", "POS Profile"),
+	"stock": ("Stock Ledger Entry", "Batch", "Serial No"),
+	"sales_persons": ("Sales Person",),
+	"item_groups": ("Item Group",),
+}
+
+
+def get_profile_fingerprint(dataset, pos_profile, *args):
+	values = {}
+	for field in PROFILE_FIELDS[dataset]:
+		value = pos_profile.get(field)
+		if field == "customer_groups":
+			value = sorted(d.get("customer_group") for d in value or [])
+		values[field] = value
+	payload = json.dumps([values, args], sort_keys=True, default=str)
+	return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def get_version_key(dataset):
+	return frappe.cache().make_key(f"{CACHE_PREFIX}{dataset}|version")
+
+
+def get_dataset_version(dataset):
+	return int(frappe.cache().get(get_version_key(dataset)) or 0)
+
+
+def get_version_token(datasets, *args):
+	"""Return a token that changes whenever one of `datasets` changes or `args` differ."""
+	versions = [int(v or 0) for v in frappe.cache().mget([get_version_key(d) for d in datasets])]
+	payload = json.dumps([versions, args], sort_keys=True, default=str)
+	return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+
+def versioned(datasets, version, generator, *args):
+	"""Wrap `generator()` for conditional requests.
+
+	Without `version` the plain result is returned, for existing callers.
+	Otherwise the answer is `{"version", "data"}`, or `{"version",
+	"not_modified"}` without calling `generator` when `version` is current.
+	"""
+	if version is None:
+		return generator()
+
+	token = get_version_token(datasets, *args)
+	if version == token:
+		return {"version": token, "not_modified": 1}
+	return {"version": token, "data": generator()}
+
+
+def get_cached(dataset, fingerprint, generator, ttl):
+	"""Return the cached value of `dataset` for `fingerprint`, building it on a miss."""
+	key = f"{CACHE_PREFIX}{dataset}|{get_dataset_version(dataset)}|{fingerprint}"
+	value = frappe.cache().get_value(key)
+	if value is None:
+		value = generator()
+		frappe.cache().set_value(key, value, expires_in_sec=ttl)
+	return value
+
+
+def invalidate(*datasets):
+	for dataset in datasets:
+		frappe.cache().incr(get_version_key(dataset))
+
+
+def on_change(doc, method, *args):
+	datasets = [dataset for dataset, doctypes in DATASET_DOCTYPES.items() if doc.doctype in doctypes]
+	if datasets:
+		frappe.db.after_commit.add(lambda: invalidate(*datasets))
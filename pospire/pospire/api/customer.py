@@ -5,6 +5,7 @@
 import frappe
 from frappe import _
 
+from pospire.pospire.api.loyalty import get_loyalty_balance
 from pospire.pospire.doctype.referral_code.referral_code import (
 	create_referral_code,
 )
@@ -50,3 +51,44 @@ def validate_referral_code(doc):
 			exist = frappe.db.exists("Referral Code", {"referral_code": referral_code})
 		if not exist:
 			frappe.throw(_("This Referral Code {0} not exists").format(referral_code))
+
+
+def get_customer_profile(customer):
+	"""Return the customer details shown at the till, read in one joined query."""
+	res = frappe.db.sql(
+		"""
+		SELECT
+			customer.email_id,
+			customer.mobile_no,
+			customer.image,
+			customer.loyalty_program,
+			customer.default_price_list AS customer_price_list,
+			customer.customer_group,
+			customer.customer_type,
+			customer.territory,
+			customer.posa_birthday AS birthday,
+			customer.gender,
+			customer.tax_id,
+			customer.posa_discount,
+			customer.name,
+			customer.customer_name,
+			customer_group.default_price_list AS customer_group_price_list,
+			loyalty_program.conversion_factor
+		FROM `tabCustomer` customer
+		LEFT JOIN `tabCustomer Group` customer_group
+			ON customer_group.name = customer.customer_group
+		LEFT JOIN `tabLoyalty Program` loyalty_program
+			ON loyalty_program.name = customer.loyalty_program
+		WHERE customer.name = %s
+		""",
+		customer,
+		as_dict=1,
+	)
+	if not res:
+		frappe.throw(_("Customer {0} not found").format(customer), frappe.DoesNotExistError)
+
+	res = res[0]
+	res["loyalty_points"] = None
+	if res.loyalty_program:
+		res["loyalty_points"] = get_loyalty_balance(res.name, res.loyalty_program).loyalty_points
+	return res
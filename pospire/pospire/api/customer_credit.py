@@ -0,0 +1,51 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Redeemable customer credit.
+
+A customer's credit is the outstanding amount of their submitted credit notes
+and the unallocated amount of their Payment Entries. Both are read in one
+query, together with the fields redemption needs, so checkout can redeem
+credit without loading the source documents.
+"""
+
+import frappe
+
+
+def get_credit_ledger(customer, company, credit_origins=None):
+	"""Return redeemable credit rows: credit notes first, then advances, newest first in each.
+
+	Each row has `type` ("Invoice" or "Advance"), `credit_origin`, `total_credit`,
+	`credit_to_redeem`, `return_against`, `account` and `remarks`. `credit_origins`
+	limits the rows to those documents.
+	"""
+	values = {"customer": customer, "company": company}
+	origin_condition = ""
+	if credit_origins is not None:
+		if not credit_origins:
+			return []
+		origin_condition = "AND name IN %(credit_origins)s"
+		values["credit_origins"] = tuple(credit_origins)
+
+	rows = frappe.db.sql(  # nosemgrep: frappe-sql-format-injection
+		# origin_condition is a fixed string, every value is passed as a parameter
+		f"""
+		SELECT 'Invoice' AS type, name AS credit_origin, -outstanding_amount AS total_credit,
+			return_against, debit_to AS account, NULL AS remarks, 0 AS source, modified
+		FROM `tabSales Invoice`
+		WHERE docstatus = 1 AND is_return = 1 AND outstanding_amount < 0
+			AND customer = %(customer)s AND company = %(company)s {origin_condition}
+		UNION ALL
+		SELECT 'Advance', name, unallocated_amount, NULL, paid_from, remarks, 1, modified
+		FROM `tabPayment Entry`
+		WHERE docstatus = 1 AND unallocated_amount > 0 AND party_type = 'Customer'
+			AND party = %(customer)s AND company = %(company)s {origin_condition}
+		ORDER BY source, modified DESC
+		""",
+		values,
+		as_dict=1,
+	)
+	for row in rows:
+		del row["source"], row["modified"]
+		row.credit_to_redeem = 0
+	return rows
@@ -0,0 +1,157 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Redis search index over customer name, mobile number, email and tax id.
+
+Uses the trigram and prefix structures of `item_search` under its own key
+prefix. Mobile numbers are also indexed as bare digits, so a cashier can type
+them without spaces or country code punctuation. The index is built by a
+background job on first use, `search_customers` falling back to a LIKE query
+meanwhile, and kept current from Customer doc events.
+"""
+
+import json
+import re
+
+import frappe
+from frappe.utils.background_jobs import enqueue
+
+from pospire.pospire.api.item_search import (
+	add_terms,
+	get_candidate_docs,
+	get_candidates,
+	get_match_score,
+	get_query_words,
+	get_terms,
+	is_index_live,
+	make_key,
+	remove_terms,
+)
+from pospire.pospire.api.scan import get_chunks
+
+INDEX_PREFIX = "pospire_customer_search|"
+CUSTOMER_FIELDS = ["name", "customer_name", "customer_group", "mobile_no", "email_id", "tax_id"]
+
+
+def search_customer_names(search_value, customer_groups=None, limit=20):
+	"""Return customer names matching every word of `search_value`, best match first.
+
+	`customer_groups`, when given, limits results to customers of those groups.
+	Returns None while the index is being built.
+	"""
+	words = get_query_words(search_value)
+	if not words:
+		return []
+
+	if not ensure_search_index():
+		return None
+	candidates = get_candidates(words, INDEX_PREFIX)
+	if not candidates:
+		return []
+
+	query = " ".join(words)
+	ranked = []
+	for name, doc in get_candidate_docs(candidates, INDEX_PREFIX):
+		if customer_groups and doc["customer_group"] not in customer_groups:
+			continue
+		score = get_match_score(words, query, doc)
+		if score:
+			ranked.append((-score, doc["customer_name"].lower(), name))
+
+	ranked.sort()
+	return [name for _score, _customer_name, name in ranked[: int(limit)]]
+
+
+def ensure_search_index(now=False):
+	"""Return whether the index is built; if not, build it, in a background job unless `now` is set."""
+	if frappe.cache().get_value(INDEX_PREFIX + "built"):
+		return True
+	if now:
+		build_search_index()
+		return True
+	enqueue(
+		"pospire.pospire.api.customer_search.build_search_index",
+		queue="long",
+		job_id="pospire_customer_search",
+		deduplicate=True,
+	)
+	return False
+
+
+def build_search_index():
+	# Customer events update the index from here on, so customers saved while it builds are not left stale
+	frappe.cache().set_value(INDEX_PREFIX + "building", 1)
+	pipeline = frappe.cache().pipeline()
+	for customers in get_chunks("Customer", CUSTOMER_FIELDS[1:]):
+		for customer in customers:
+			add_to_index(pipeline, customer)
+		pipeline.execute()
+	frappe.cache().set_value(INDEX_PREFIX + "built", 1)
+	frappe.cache().delete_value(INDEX_PREFIX + "building")
+
+
+def add_to_index(pipeline, customer):
+	mobile_digits = re.sub(r"\D", "", customer.mobile_no or "")
+	email_user = (customer.email_id or "").split("@")[0]
+	codes = [
+		c.lower()
+		for c in [customer.name, customer.mobile_no, mobile_digits, customer.email_id, customer.tax_id]
+		if c
+	]
+	terms = get_terms(
+		customer.name,
+		customer.customer_name,
+		customer.mobile_no,
+		mobile_digits,
+		customer.email_id,
+		email_user,
+		customer.tax_id,
+	)
+	add_terms(pipeline, customer.name, terms, INDEX_PREFIX)
+	pipeline.hset(
+		make_key("docs", INDEX_PREFIX),
+		customer.name,
+		json.dumps(
+			{
+				"customer_name": customer.customer_name or customer.name,
+				"customer_group": customer.customer_group,
+				"terms": sorted(terms),
+				"codes": codes,
+			}
+		),
+	)
+
+
+def remove_from_index(pipeline, name):
+	doc = frappe.cache().hmget(make_key("docs", INDEX_PREFIX), [name])[0]
+	if not doc:
+		return
+	remove_terms(pipeline, name, json.loads(doc)["terms"], INDEX_PREFIX)
+	pipeline.hdel(make_key("docs", INDEX_PREFIX), name)
+
+
+def update_customer_index(name, old_name=None):
+	if not is_index_live(INDEX_PREFIX):
+		return
+
+	pipeline = frappe.cache().pipeline()
+	remove_from_index(pipeline, name)
+	if old_name:
+		remove_from_index(pipeline, old_name)
+
+	customer = frappe.db.get_value("Customer", name, CUSTOMER_FIELDS, as_dict=1)
+	if customer:
+		add_to_index(pipeline, customer)
+	pipeline.execute()
+
+
+def on_customer_update(doc, method):
+	frappe.db.after_commit.add(lambda: update_customer_index(doc.name))
+
+
+def on_customer_trash(doc, method):
+	frappe.db.after_commit.add(lambda: update_customer_index(doc.name))
+
+
+def on_customer_rename(doc, method, old, new, merge):
+	frappe.db.after_commit.add(lambda: update_customer_index(new, old_name=old))
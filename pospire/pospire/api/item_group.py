@@ -0,0 +1,68 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Item group filtering for POS Profiles as nested set ranges.
+
+A profile's item groups are resolved to the `lft/rgt` ranges of their
+subtrees, with nested ranges merged away, and kept in Redis per profile.
+Catalog queries then filter on a handful of range predicates instead of an
+`IN` list of every descendant group. Entries are dropped when any Item Group
+or the POS Profile changes.
+"""
+
+import frappe
+
+RANGES_KEY = "pospire_item_group_ranges"
+
+
+def get_item_group_ranges(pos_profile):
+	"""Return `[(lft, rgt)]` covering the profile's item groups, or `[]` for all groups."""
+	ranges = frappe.cache().hget(RANGES_KEY, pos_profile)
+	if ranges is None:
+		ranges = merge_ranges(
+			frappe.db.sql(
+				"""
+				SELECT ig.lft, ig.rgt
+				FROM `tabPOS Item Group` pig
+				INNER JOIN `tabItem Group` ig ON ig.name = pig.item_group
+				WHERE pig.parenttype = 'POS Profile' AND pig.parent = %s
+				""",
+				pos_profile,
+			)
+		)
+		frappe.cache().hset(RANGES_KEY, pos_profile, ranges)
+	return ranges
+
+
+def merge_ranges(ranges):
+	merged = []
+	for lft, rgt in sorted(ranges):
+		if merged and lft <= merged[-1][1]:
+			merged[-1] = (merged[-1][0], max(merged[-1][1], rgt))
+		else:
+			merged.append((lft, rgt))
+	return merged
+
+
+def get_item_group_range_condition(pos_profile):
+	ranges = get_item_group_ranges(pos_profile)
+	if not ranges:
+		return " and 1=1"
+
+	predicates = " or ".join(f"(ig.lft >= {int(lft)} and ig.rgt <= {int(rgt)})" for lft, rgt in ranges)
+	return f" and item_group in (select ig.name from `tabItem Group` ig where {predicates})"
+
+
+def clear_item_group_ranges(pos_profile=None):
+	if pos_profile:
+		frappe.cache().hdel(RANGES_KEY, pos_profile)
+	else:
+		frappe.cache().delete_value(RANGES_KEY)
+
+
+def on_item_group_change(doc, method, *args):
+	frappe.db.after_commit.add(clear_item_group_ranges)
+
+
+def on_pos_profile_update(doc, method):
+	frappe.db.after_commit.add(lambda: clear_item_group_ranges(doc.name))
@@ -0,0 +1,239 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Bulk loaders used to build POS item rows.
+
+Every loader takes the full list of item codes and answers with a dict keyed
+by item code, so building the catalog costs a fixed number of grouped queries
+instead of several queries per item.
+"""
+
+import frappe
+from frappe.utils import getdate
+
+from pospire.pospire.api.batch import get_batch_availability
+from pospire.pospire.api.item_price import resolve_prices
+from pospire.pospire.api.stock import get_stock_qty_map
+from pospire.pospire.api.variant import get_template_attributes
+
+
+def build_item_rows(pos_profile, items_data, price_list, customer=None):
+	"""Join prices, barcodes, serials, batches, stock and attributes onto `items_data`."""
+	return set_item_stock_data(pos_profile, get_item_base_rows(pos_profile, items_data, price_list, customer))
+
+
+def get_item_base_rows(pos_profile, items_data, price_list, customer=None):
+	"""Join prices, barcodes and attributes onto `items_data`.
+
+	These rows do not depend on stock, so they can be cached until an Item,
+	Item Price or POS Profile changes.
+	"""
+	if not items_data:
+		return []
+
+	items = [d.item_code for d in items_data]
+	item_prices = resolve_prices(items, price_list, pos_profile.get("currency"), customer)
+	item_barcodes = get_item_barcodes(items)
+
+	template_attributes = {}
+	variant_attributes = {}
+	if pos_profile.get("posa_show_template_items"):
+		template_attributes = get_template_attributes([d.item_code for d in items_data if d.has_variants])
+		variant_attributes = get_variant_attributes([d.item_code for d in items_data if d.variant_of])
+
+	result = []
+	for item in items_data:
+		item_code = item.item_code
+		item_price = {}
+		if item_prices.get(item_code):
+			item_price = (
+				item_prices.get(item_code).get(item.stock_uom) or item_prices.get(item_code).get("None") or {}
+			)
+
+		row = {}
+		row.update(item)
+		row.update(
+			{
+				"rate": item_price.get("price_list_rate") or 0,
+				"currency": item_price.get("currency") or pos_profile.get("currency"),
+				"item_barcode": item_barcodes.get(item_code) or [],
+				"attributes": template_attributes.get(item_code) or "",
+				"item_attributes": variant_attributes.get(item_code) or "",
+			}
+		)
+		result.append(row)
+	return result
+
+
+def set_item_stock_data(pos_profile, rows):
+	"""Add stock, serial and batch data to `rows`, dropping items out of stock if required."""
+	if not rows:
+		return []
+
+	warehouse = pos_profile.get("warehouse")
+	posa_display_items_in_stock = pos_profile.get("posa_display_items_in_stock")
+
+	items = [d["item_code"] for d in rows]
+	batch_no_data = {}
+	if pos_profile.get("posa_search_batch_no"):
+		batch_no_data = get_batch_availability(items, warehouse, pos_profile.get("posa_use_server_cache"))
+
+	serial_nos = {}
+	if pos_profile.get("posa_search_serial_no"):
+		serial_nos = get_item_serial_nos(items, warehouse)
+
+	stock_qty = {}
+	if posa_display_items_in_stock or pos_profile.get("pose_use_limit_search"):
+		stock_qty = get_stock_qty_map(items, warehouse, pos_profile.get("posa_use_server_cache"))
+
+	result = []
+	for row in rows:
+		item_code = row["item_code"]
+		item_stock_qty = stock_qty.get(item_code, 0)
+		if posa_display_items_in_stock and (not item_stock_qty or item_stock_qty < 0):
+			continue
+
+		row = dict(row)
+		row.update(
+			{
+				"actual_qty": item_stock_qty or 0,
+				"serial_no_data": serial_nos.get(item_code) or [],
+				"batch_no_data": batch_no_data.get(item_code) or [],
+			}
+		)
+		result.append(row)
+	return result
+
+
+def get_item_master_details(items):
+	"""Return `{item_code: {item_uoms, has_batch_no, has_serial_no}}`."""
+	if not items:
+		return {}
+
+	item_details = {
+		d.name: {"item_uoms": [], "has_batch_no": d.has_batch_no, "has_serial_no": d.has_serial_no}
+		for d in frappe.get_all(
+			"Item",
+			filters={"name": ["in", items]},
+			fields=["name", "has_batch_no", "has_serial_no"],
+		)
+	}
+	for row in frappe.get_all(
+		"UOM Conversion Detail",
+		filters={"parent": ["in", items]},
+		fields=["parent", "uom", "conversion_factor"],
+		order_by="idx asc",
+	):
+		if row.parent in item_details:
+			item_details[row.pop("parent")]["item_uoms"].append(row)
+	return item_details
+
+
+def get_item_barcodes(items):
+	"""Return `{item_code: [{barcode, posa_uom}]}`."""
+	barcodes = {}
+	if not items:
+		return barcodes
+
+	for row in frappe.get_all(
+		"Item Barcode",
+		filters={"parent": ["in", items]},
+		fields=["parent", "barcode", "posa_uom"],
+	):
+		barcodes.setdefault(row.pop("parent"), []).append(row)
+	return barcodes
+
+
+def get_item_serial_nos(items, warehouse):
+	"""Return `{item_code: [{serial_no}]}` for active serials in the warehouse."""
+	serial_nos = {}
+	if not items:
+		return serial_nos
+
+	for row in frappe.get_all(
+		"Serial No",
+		filters={
+			"item_code": ["in", items],
+			"status": "Active",
+			"warehouse": warehouse,
+		},
+		fields=["item_code", "name as serial_no"],
+	):
+		serial_nos.setdefault(row.pop("item_code"), []).append(row)
+	return serial_nos
+
+
+def get_variant_attributes(items):
+	"""Return `{variant: [{attribute, attribute_value}]}`."""
+	attributes = {}
+	if not items:
+		return attributes
+
+	for row in frappe.get_all(
+		"Item Variant Attribute",
+		fields=["parent", "attribute", "attribute_value"],
+		filters={"parent": ["in", items], "parentfield": "attributes"},
+	):
+		attributes.setdefault(row.pop("parent"), []).append(row)
+	return attributes
+
+
+def get_changed_items(watermark, price_list, warehouse):
+	"""Return `(changed, deleted)` item code sets touched after `watermark`.
+
+	An item counts as changed when the Item itself, one of its prices in
+	`price_list`, its Bin in `warehouse` or one of its batches was modified,
+	or when one of its prices became valid or expired since `watermark`.
+	"""
+	changed = set(frappe.get_all("Item", filters={"modified": [">", watermark]}, pluck="name"))
+	changed.update(
+		frappe.get_all(
+			"Item Price",
+			filters={"price_list": price_list, "modified": [">", watermark]},
+			pluck="item_code",
+			distinct=True,
+		)
+	)
+	# Validity dates change the price in effect without modifying the Item Price
+	watermark_date, today = getdate(watermark), getdate()
+	if watermark_date < today:
+		for filters in (
+			[["valid_from", ">", watermark_date], ["valid_from", "<=", today]],
+			[["valid_upto", ">=", watermark_date], ["valid_upto", "<", today]],
+		):
+			changed.update(
+				frappe.get_all(
+					"Item Price",
+					filters=[["price_list", "=", price_list], *filters],
+					pluck="item_code",
+					distinct=True,
+				)
+			)
+	if warehouse:
+		changed.update(
+			frappe.get_all(
+				"Bin",
+				filters={"warehouse": warehouse, "modified": [">", watermark]},
+				pluck="item_code",
+			)
+		)
+	changed.update(
+		frappe.get_all("Batch", filters={"modified": [">", watermark]}, pluck="item", distinct=True)
+	)
+
+	deleted = set()
+	for row in frappe.get_all(
+		"Deleted Document",
+		filters={"deleted_doctype": ["in", ["Item", "Item Price"]], "creation": [">", watermark]},
+		fields=["deleted_doctype", "deleted_name", "data"],
+	):
+		if row.deleted_doctype == "Item":
+			deleted.add(row.deleted_name)
+		else:
+			price = frappe.parse_json(row.data) or {}
+			if price.get("price_list") == price_list and price.get("item_code"):
+				changed.add(price.get("item_code"))
+
+	changed -= deleted
+	changed.discard(None)
+	return changed, deleted
@@ -0,0 +1,138 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Redis price index used to resolve POS selling prices.
+
+Selling Item Prices are kept in one Redis hash per `(price_list, currency)`,
+keyed by item code. Each entry holds the item's prices for every UOM and
+customer together with their validity window, so resolving prices for a set
+of items is a single hash probe. The index is built lazily on first use and
+kept current from Item Price, Price List and Item rename doc events.
+"""
+
+import pickle
+
+import frappe
+from frappe.utils import getdate
+
+PRICE_FIELDS = ["item_code", "uom", "customer", "valid_from", "valid_upto", "price_list_rate", "currency"]
+
+
+def resolve_prices(items, price_list, currency, customer=None, date=None):
+	"""Return `{item_code: {uom or "None": price}}` of prices valid on `date`.
+
+	Prices for `customer` and prices without a customer both apply. When more
+	than one price matches a UOM, the one with the latest `valid_from` wins.
+	"""
+	items = list(set(items or []))
+	if not items or not price_list:
+		return {}
+
+	date = getdate(date)
+	ensure_price_index(price_list, currency)
+
+	item_prices = {}
+	for item_code, entries in get_index_entries(price_list, currency, items).items():
+		for d in sorted(entries, key=get_price_sort_key):
+			if d.customer not in ("", None, customer):
+				continue
+			if not d.valid_from or getdate(d.valid_from) > date:
+				continue
+			if d.valid_upto and getdate(d.valid_upto) < date:
+				continue
+			item_prices.setdefault(item_code, {})[d.uom or "None"] = d
+	return item_prices
+
+
+def get_price_sort_key(price):
+	# valid_from ascending, then valid_upto descending with open-ended prices last
+	valid_upto = getdate(price.valid_upto).toordinal() if price.valid_upto else float("-inf")
+	return (getdate(price.valid_from) if price.valid_from else getdate("1900-01-01"), -valid_upto)
+
+
+def get_price_index_key(price_list, currency):
+	return f"pospire_price_index|{price_list}|{currency}|"
+
+
+def get_index_entries(price_list, currency, items):
+	key = frappe.cache().make_key(get_price_index_key(price_list, currency))
+	values = frappe.cache().hmget(key, items)
+	return {
+		item_code: pickle.loads(value)
+		for item_code, value in zip(items, values, strict=True)
+		if value is not None
+	}
+
+
+def ensure_price_index(price_list, currency):
+	if frappe.cache().get_value(get_price_index_key(price_list, currency) + "built"):
+		return
+
+	entries = {}
+	for d in frappe.get_all(
+		"Item Price",
+		filters={"price_list": price_list, "currency": currency, "selling": 1},
+		fields=PRICE_FIELDS,
+	):
+		entries.setdefault(d.item_code, []).append(d)
+
+	key = frappe.cache().make_key(get_price_index_key(price_list, currency))
+	pipeline = frappe.cache().pipeline()
+	pipeline.delete(key)
+	for item_code, rows in entries.items():
+		pipeline.hset(key, item_code, pickle.dumps(rows))
+	pipeline.execute()
+	frappe.cache().set_value(get_price_index_key(price_list, currency) + "built", 1)
+
+
+def refresh_price_index_entry(price_list, currency, item_code):
+	"""Reload one item's prices into an already built index."""
+	if not frappe.cache().get_value(get_price_index_key(price_list, currency) + "built"):
+		return
+
+	rows = frappe.get_all(
+		"Item Price",
+		filters={"price_list": price_list, "currency": currency, "selling": 1, "item_code": item_code},
+		fields=PRICE_FIELDS,
+	)
+	if rows:
+		frappe.cache().hset(get_price_index_key(price_list, currency), item_code, rows)
+	else:
+		frappe.cache().hdel(get_price_index_key(price_list, currency), item_code)
+
+
+def clear_price_index(price_list):
+	frappe.cache().delete_keys(f"pospire_price_index|{price_list}|")
+
+
+def on_item_price_change(doc, method):
+	keys = {(doc.price_list, doc.currency, doc.item_code)}
+	old_doc = doc.get_doc_before_save()
+	if old_doc:
+		keys.add((old_doc.price_list, old_doc.currency, old_doc.item_code))
+
+	def refresh():
+		for price_list, currency, item_code in keys:
+			refresh_price_index_entry(price_list, currency, item_code)
+
+	frappe.db.after_commit.add(refresh)
+
+
+def on_item_rename(doc, method, old, new, merge):
+	# Renaming rewrites the Item Price links in SQL, without their doc events
+	def refresh():
+		for price_list, currency in frappe.get_all(
+			"Item Price",
+			filters={"item_code": new, "selling": 1},
+			fields=["price_list", "currency"],
+			distinct=True,
+			as_list=True,
+		):
+			refresh_price_index_entry(price_list, currency, old)
+			refresh_price_index_entry(price_list, currency, new)
+
+	frappe.db.after_commit.add(refresh)
+
+
+def on_price_list_update(doc, method):
+	frappe.db.after_commit.add(lambda: clear_price_index(doc.name))
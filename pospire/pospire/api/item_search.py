@@ -0,0 +1,249 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Redis search index over item code, item name, barcode and brand.
+
+Every sellable item is split into lowercase terms. Each term is added to one
+Redis set per trigram and to a lexically sorted set used for prefix lookups.
+A query takes the names with a term starting with each of its words, then
+fills up from the intersection of the trigram sets of its words, both capped
+in Redis, and ranks only those, so it never scans `tabItem` nor decodes the
+whole match set. The index is built by a background job on first use, the
+callers falling back to a LIKE query meanwhile, and kept current from Item
+doc events.
+"""
+
+import json
+import re
+
+import frappe
+from frappe.utils.background_jobs import enqueue
+
+from pospire.pospire.api.scan import get_chunks
+
+INDEX_PREFIX = "pospire_item_search|"
+# Names taken from the prefix matches, then from the substring matches, of a query
+MAX_CANDIDATES = 1000
+TERM_SEPARATOR = "\x00"
+ITEM_FILTERS = {"disabled": 0, "is_sales_item": 1, "is_fixed_asset": 0}
+
+
+def make_key(name, prefix=INDEX_PREFIX):
+	return frappe.cache().make_key(prefix + name)
+
+
+def get_terms(*values):
+	terms = set()
+	for value in values:
+		value = (value or "").strip().lower()
+		if not value:
+			continue
+		terms.add(value)
+		terms.update(t for t in re.split(r"[\s\-_/,.()]+", value) if t)
+	return terms
+
+
+def get_trigrams(term):
+	return {term[i : i + 3] for i in range(len(term) - 2)}
+
+
+def search_item_codes(search_value, limit=20):
+	"""Return item codes matching every word of `search_value`, best match first.
+
+	Returns None while the index is being built.
+	"""
+	words = get_query_words(search_value)
+	if not words:
+		return []
+
+	if not ensure_search_index():
+		return None
+	candidates = get_candidates(words)
+	if not candidates:
+		return []
+
+	query = " ".join(words)
+	ranked = []
+	for item_code, doc in get_candidate_docs(candidates):
+		score = get_match_score(words, query, doc)
+		if score:
+			ranked.append((-score, doc["item_name"].lower(), item_code))
+
+	ranked.sort()
+	return [item_code for _score, _item_name, item_code in ranked[: int(limit)]]
+
+
+def get_query_words(search_value):
+	return [w for w in re.split(r"\s+", (search_value or "").strip().lower()) if w]
+
+
+def get_candidates(words, prefix=INDEX_PREFIX):
+	"""Return up to twice `MAX_CANDIDATES` names that may match every word, unranked.
+
+	Names with a term starting with every word rank above substring matches, so
+	they are taken first; only when there are too few of them does the trigram
+	intersection of the words of three or more characters fill up.
+	"""
+	cache = frappe.cache()
+	pipeline = cache.pipeline()
+	for word in words:
+		pipeline.zrangebylex(
+			make_key("terms", prefix), f"[{word}", f"[{word}\xff", start=0, num=MAX_CANDIDATES
+		)
+	candidates = None
+	for members in pipeline.execute():
+		names = {decode(m).split(TERM_SEPARATOR, 1)[1] for m in members}
+		candidates = names if candidates is None else candidates & names
+
+	trigrams = set().union(*(get_trigrams(word) for word in words))
+	if len(candidates) >= MAX_CANDIDATES or not trigrams:
+		return list(candidates)
+
+	# Intersect and cap in Redis, sorted so the same query returns the same names
+	matches_key = make_key("matches|" + frappe.generate_hash(length=10), prefix)
+	pipeline.sinterstore(matches_key, [make_key("tri|" + t, prefix) for t in trigrams])
+	pipeline.sort(matches_key, start=0, num=MAX_CANDIDATES, alpha=True)
+	pipeline.delete(matches_key)
+	matches = pipeline.execute()[1]
+	return list(candidates | {decode(m) for m in matches})
+
+
+def decode(value):
+	return value.decode() if isinstance(value, bytes) else value
+
+
+def get_candidate_docs(candidates, prefix=INDEX_PREFIX):
+	"""Yield `(name, doc)` for each indexed candidate."""
+	for name, doc in zip(candidates, frappe.cache().hmget(make_key("docs", prefix), candidates), strict=True):
+		if doc:
+			yield name, json.loads(doc)
+
+
+def get_match_score(words, query, doc):
+	"""Score how well `doc` matches; 0 when some word does not match at all."""
+	terms = doc["terms"]
+	score = 0
+	for word in words:
+		if word in terms:
+			score += 3
+		elif any(t.startswith(word) for t in terms):
+			score += 2
+		elif any(word in t for t in terms):
+			score += 1
+		else:
+			return 0
+	if query in doc["codes"]:
+		score += 10
+	return score
+
+
+def is_index_live(prefix=INDEX_PREFIX):
+	"""Return whether doc events should update the index, i.e. it is built or being built."""
+	cache = frappe.cache()
+	return cache.get_value(prefix + "built") or cache.get_value(prefix + "building")
+
+
+def ensure_search_index(now=False):
+	"""Return whether the index is built; if not, build it, in a background job unless `now` is set."""
+	if frappe.cache().get_value(INDEX_PREFIX + "built"):
+		return True
+	if now:
+		build_search_index()
+		return True
+	enqueue(
+		"pospire.pospire.api.item_search.build_search_index",
+		queue="long",
+		job_id="pospire_item_search",
+		deduplicate=True,
+	)
+	return False
+
+
+def build_search_index():
+	# Item events update the index from here on, so items saved while it builds are not left stale
+	frappe.cache().set_value(INDEX_PREFIX + "building", 1)
+	pipeline = frappe.cache().pipeline()
+	for items in get_chunks("Item", ["item_name", "brand"], ITEM_FILTERS):
+		barcodes = {}
+		for row in frappe.get_all(
+			"Item Barcode", filters={"parent": ["in", [d.name for d in items]]}, fields=["parent", "barcode"]
+		):
+			barcodes.setdefault(row.parent, []).append(row.barcode)
+		for item in items:
+			add_to_index(pipeline, item, barcodes.get(item.name, []))
+		pipeline.execute()
+	frappe.cache().set_value(INDEX_PREFIX + "built", 1)
+	frappe.cache().delete_value(INDEX_PREFIX + "building")
+
+
+def add_to_index(pipeline, item, barcodes):
+	codes = [c.lower() for c in [item.name, *barcodes] if c]
+	terms = get_terms(item.name, item.item_name, item.brand, *barcodes)
+	add_terms(pipeline, item.name, terms)
+	pipeline.hset(
+		make_key("docs"),
+		item.name,
+		json.dumps({"item_name": item.item_name or item.name, "terms": sorted(terms), "codes": codes}),
+	)
+
+
+def remove_from_index(pipeline, item_code):
+	doc = frappe.cache().hmget(make_key("docs"), [item_code])[0]
+	if not doc:
+		return
+	remove_terms(pipeline, item_code, json.loads(doc)["terms"])
+	pipeline.hdel(make_key("docs"), item_code)
+
+
+def add_terms(pipeline, name, terms, prefix=INDEX_PREFIX):
+	for term in terms:
+		pipeline.zadd(make_key("terms", prefix), {f"{term}{TERM_SEPARATOR}{name}": 0})
+		for trigram in get_trigrams(term):
+			pipeline.sadd(make_key("tri|" + trigram, prefix), name)
+
+
+def remove_terms(pipeline, name, terms, prefix=INDEX_PREFIX):
+	for term in terms:
+		pipeline.zrem(make_key("terms", prefix), f"{term}{TERM_SEPARATOR}{name}")
+		for trigram in get_trigrams(term):
+			pipeline.srem(make_key("tri|" + trigram, prefix), name)
+
+
+def update_item_index(item_code, old_item_code=None):
+	if not is_index_live():
+		return
+
+	pipeline = frappe.cache().pipeline()
+	remove_from_index(pipeline, old_item_code or item_code)
+	if old_item_code:
+		remove_from_index(pipeline, item_code)
+
+	item = frappe.db.get_value(
+		"Item",
+		{"name": item_code, **ITEM_FILTERS},
+		["name", "item_name", "brand"],
+		as_dict=1,
+	)
+	if item:
+		barcodes = frappe.get_all("Item Barcode", filters={"parent": item_code}, pluck="barcode")
+		add_to_index(pipeline, item, barcodes)
+	pipeline.execute()
+
+
+def on_item_update(doc, method):
+	frappe.db.after_commit.add(lambda: update_item_index(doc.name))
+
+
+def on_item_trash(doc, method):
+	def remove():
+		if not is_index_live():
+			return
+		pipeline = frappe.cache().pipeline()
+		remove_from_index(pipeline, doc.name)
+		pipeline.execute()
+
+	frappe.db.after_commit.add(remove)
+
+
+def on_item_rename(doc, method, old, new, merge):
+	frappe.db.after_commit.add(lambda: update_item_index(new, old_item_code=old))
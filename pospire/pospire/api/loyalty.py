@@ -0,0 +1,73 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Cached loyalty point balances.
+
+A customer's balance for a loyalty program is aggregated from the Loyalty
+Point Entry ledger once per day and kept in Redis, since expiry makes it date
+dependent. The cached balance is dropped whenever the customer's ledger
+changes: new entries (earned, redeemed or written by `add_loyalty_point`) as
+they commit, and entries removed when an invoice is cancelled or deleted,
+which ERPNext deletes without doc events. Dropping rather than adjusting it
+keeps a balance read concurrently from counting an entry twice.
+"""
+
+import frappe
+from frappe.utils import flt, getdate, today
+
+BALANCE_TTL = 2 * 24 * 60 * 60
+
+
+def get_balance_key(customer):
+	return frappe.cache().make_key(f"pospire_loyalty_balance|{getdate(today())}|{customer}")
+
+
+def get_balance_field(loyalty_program, field):
+	return f"{loyalty_program}|{field}"
+
+
+def get_loyalty_balance(customer, loyalty_program):
+	"""Return `{loyalty_points, total_spent}` of unexpired entries posted up to today."""
+	key = get_balance_key(customer)
+	fields = [get_balance_field(loyalty_program, f) for f in ("loyalty_points", "total_spent")]
+	points, spent = frappe.cache().hmget(key, fields)
+	if points is not None and spent is not None:
+		return frappe._dict({"loyalty_points": flt(points), "total_spent": flt(spent)})
+
+	date = today()
+	balance = frappe.db.sql(
+		"""
+		SELECT SUM(loyalty_points) AS loyalty_points, SUM(purchase_amount) AS total_spent
+		FROM `tabLoyalty Point Entry`
+		WHERE customer = %(customer)s AND loyalty_program = %(loyalty_program)s
+			AND posting_date <= %(date)s AND expiry_date >= %(date)s
+		""",
+		{"customer": customer, "loyalty_program": loyalty_program, "date": date},
+		as_dict=1,
+	)[0]
+	balance = frappe._dict(
+		{"loyalty_points": flt(balance.loyalty_points), "total_spent": flt(balance.total_spent)}
+	)
+
+	pipeline = frappe.cache().pipeline()
+	pipeline.hset(key, fields[0], balance.loyalty_points)
+	pipeline.hset(key, fields[1], balance.total_spent)
+	pipeline.expire(key, BALANCE_TTL)
+	pipeline.execute()
+	return balance
+
+
+def clear_balance(customer):
+	frappe.cache().delete(get_balance_key(customer))
+
+
+def on_loyalty_point_entry_insert(doc, method):
+	frappe.db.after_commit.add(lambda: clear_balance(doc.customer))
+
+
+def on_loyalty_point_entry_trash(doc, method):
+	frappe.db.after_commit.add(lambda: clear_balance(doc.customer))
+
+
+def on_invoice_cancel(doc, method):
+	frappe.db.after_commit.add(lambda: clear_balance(doc.customer))
@@ -0,0 +1,54 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Compact columnar encoding for large row lists sent to the POS.
+
+Rows are sent as one array per column instead of one object per row, and
+columns with few distinct strings are dictionary encoded as indexes into a
+list of those strings. The whole body can additionally be gzip compressed
+and base64 encoded. `payload.js` decodes it on the client.
+"""
+
+import base64
+import gzip
+import json
+
+from frappe.utils import cint
+
+PAYLOAD_FORMAT = "columns"
+DICTIONARY_FIELDS = ("item_group", "brand", "stock_uom", "currency", "variant_of")
+
+
+def format_rows(rows, compact=0, compress=0):
+	"""Return `rows` unchanged, or in the columnar format when `compact` is set."""
+	if not cint(compact):
+		return rows
+	return encode_rows(rows, compress=cint(compress))
+
+
+def encode_rows(rows, compress=False):
+	columns = {}
+	for row in rows:
+		for key in row:
+			columns.setdefault(key, [])
+	for key, values in columns.items():
+		values.extend(row.get(key) for row in rows)
+
+	dictionaries = {}
+	for key in DICTIONARY_FIELDS:
+		if key not in columns:
+			continue
+		index = {}
+		columns[key] = [None if v is None else index.setdefault(v, len(index)) for v in columns[key]]
+		dictionaries[key] = list(index)
+
+	body = {"format": PAYLOAD_FORMAT, "length": len(rows), "columns": columns, "dictionaries": dictionaries}
+	if not compress:
+		return body
+
+	data = json.dumps(body, separators=(",", ":"), default=str).encode()
+	return {
+		"format": PAYLOAD_FORMAT,
+		"encoding": "gzip",
+		"data": base64.b64encode(gzip.compress(data, compresslevel=6)).decode(),
+	}
@@ -6,17 +6,12 @@ import json
 
 import frappe
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
-	get_accounting_dimensions,
 	get_checks_for_pl_and_bs_accounts,
 )
-from erpnext.accounts.doctype.loyalty_program.loyalty_program import (
-	get_loyalty_program_details_with_points,
-)
 from erpnext.accounts.doctype.payment_request.payment_request import (
 	get_dummy_message,
 	get_existing_payment_request_amount,
 )
-from erpnext.accounts.doctype.pos_profile.pos_profile import get_item_groups
 from erpnext.accounts.doctype.sales_invoice.sales_invoice import get_bank_cash_account
 from erpnext.accounts.party import get_party_bank_account
 from erpnext.selling.doctype.sales_order.sales_order import make_sales_invoice
@@ -26,14 +21,41 @@ from erpnext.stock.doctype.batch.batch import (
 )
 from erpnext.stock.get_item_details import get_item_details
 from frappe import _
-from frappe.utils import cstr, flt, getdate, nowdate
-from frappe.utils.background_jobs import enqueue
-from frappe.utils.caching import redis_cache
-
+from frappe.utils import cint, cstr, flt, get_datetime, getdate, now, nowdate
+
+from pospire.pospire.api import submission_queue
+from pospire.pospire.api.batch import get_batch_availability
+from pospire.pospire.api.cache import get_cached, get_profile_fingerprint, versioned
+from pospire.pospire.api.customer import get_customer_profile
+from pospire.pospire.api.customer_credit import get_credit_ledger
+from pospire.pospire.api.customer_search import search_customer_names
+from pospire.pospire.api.item_group import get_item_group_range_condition
+from pospire.pospire.api.item_loader import (
+	build_item_rows,
+	get_changed_items,
+	get_item_base_rows,
+	get_item_master_details,
+	get_item_serial_nos,
+	set_item_stock_data,
+)
+from pospire.pospire.api.item_price import resolve_prices
+from pospire.pospire.api.item_search import search_item_codes
+from pospire.pospire.api.payload import format_rows
+from pospire.pospire.api.profile_mapping import get_profile_field_values
+from pospire.pospire.api.scan import lookup_code
+from pospire.pospire.api.stock import get_stock_qty_map
+from pospire.pospire.api.variant import get_variant_matrix
+from pospire.pospire.api.warmup import enqueue_warmup
 from pospire.pospire.doctype.delivery_charges.delivery_charges import (
 	get_applicable_delivery_charges as _get_applicable_delivery_charges,
 )
 from pospire.pospire.doctype.pos_coupon.pos_coupon import check_coupon_code
+from pospire.pospire.doctype.pos_request_log.pos_request_log import run_once
+
+# Invoices accepted per sync_invoices request, matches SYNC_BATCH in outbox.js
+SYNC_BATCH_SIZE = 50
+# Largest catalog page get_items_page returns
+MAX_PAGE_LENGTH = 2000
 
 
 @frappe.whitelist()
@@ -85,6 +107,7 @@ def create_opening_voucher(pos_profile: str, company: str, balance_details: str)
 	)
 	new_pos_opening.set("balance_details", balance_details)
 	new_pos_opening.insert(ignore_permissions=True)
+	enqueue_warmup(new_pos_opening.pos_profile)
 
 	data = {}
 	data["pos_opening_shift"] = new_pos_opening.as_dict()
@@ -128,31 +151,24 @@ def get_items(
 	item_group: str = "",
 	search_value: str = "",
 	customer: str | None = None,
-) -> list:
-	_pos_profile = json.loads(pos_profile)
-	ttl = _pos_profile.get("posa_server_cache_duration")
-	if ttl:
-		ttl = int(ttl) * 30
-
-	@redis_cache(ttl=ttl or 1800)
-	def __get_items(pos_profile, price_list, item_group, search_value, customer=None):
-		return _get_items(pos_profile, price_list, item_group, search_value, customer)
-
-	def _get_items(pos_profile, price_list, item_group, search_value, customer=None):
-		pos_profile = json.loads(pos_profile)
-		today = nowdate()
+	compact: int = 0,
+	compress: int = 0,
+	version: str | None = None,
+) -> list | dict:
+	"""Return the catalog rows, in the columnar format of `payload.py` when `compact` is set.
+
+	Passing `version` (empty on first load) opts into the conditional answer of `cache.versioned`.
+	"""
+	pos_profile = json.loads(pos_profile)
+	if not price_list:
+		price_list = pos_profile.get("selling_price_list")
+
+	def _get_items():
 		data = dict()
-		posa_display_items_in_stock = pos_profile.get("posa_display_items_in_stock")
 		search_serial_no = pos_profile.get("posa_search_serial_no")
-		search_batch_no = pos_profile.get("posa_search_batch_no")
 		posa_show_template_items = pos_profile.get("posa_show_template_items")
-		warehouse = pos_profile.get("warehouse")
 		use_limit_search = pos_profile.get("pose_use_limit_search")
 		search_limit = 0
-
-		if not price_list:
-			price_list = pos_profile.get("selling_price_list")
-
 		limit = ""
 
 		condition = ""
@@ -161,7 +177,9 @@ def get_items(
 		if use_limit_search:
 			search_limit = pos_profile.get("posa_search_limit") or 500
 			if search_value:
-				data = search_serial_or_batch_or_barcode_number(search_value, search_serial_no)
+				data = search_serial_or_batch_or_barcode_number(
+					search_value, search_serial_no, pos_profile.get("posa_scale_barcode_start")
+				)
 
 			item_code = data.get("item_code") if data.get("item_code") else search_value
 			serial_no = data.get("serial_no") if data.get("serial_no") else ""
@@ -176,11 +194,202 @@ def get_items(
 		if not posa_show_template_items:
 			condition += " AND has_variants = 0"
 
-		result = []
+		items_data = get_items_data(condition, limit)
 
-		items_data = frappe.db.sql(  # nosemgrep: frappe-sql-format-injection
-			# conditions are built from frappe.db.escape() values, not raw user input
-			"""
+		return get_item_base_rows(pos_profile, items_data, price_list, customer)
+
+	def _get_item_rows():
+		# Search results follow the scan index and are only reused when typed again, so skip them
+		if pos_profile.get("posa_use_server_cache") and not search_value:
+			ttl = cint(pos_profile.get("posa_server_cache_duration")) * 30
+			fingerprint = get_profile_fingerprint(
+				"items", pos_profile, price_list, item_group, customer, nowdate()
+			)
+			rows = get_cached("items", fingerprint, _get_items, ttl or 1800)
+		else:
+			rows = _get_items()
+
+		return format_rows(set_item_stock_data(pos_profile, rows), compact, compress)
+
+	# The rows only carry stock data with these options, which any stock movement then makes stale
+	has_stock_data = any(
+		pos_profile.get(field)
+		for field in (
+			"posa_display_items_in_stock",
+			"pose_use_limit_search",
+			"posa_search_batch_no",
+			"posa_search_serial_no",
+		)
+	)
+	datasets = ["items", "stock"] if has_stock_data else ["items"]
+	return versioned(
+		datasets,
+		version,
+		_get_item_rows,
+		# Prices have validity dates
+		nowdate(),
+		pos_profile.get("name"),
+		pos_profile.get("warehouse"),
+		price_list,
+		item_group,
+		search_value,
+		customer,
+		cint(compact),
+		cint(compress),
+	)
+
+
+@frappe.whitelist()
+def get_items_delta(
+	pos_profile: str,
+	watermark: str | None = None,
+	price_list: str | None = None,
+	customer: str | None = None,
+	compact: int = 0,
+	compress: int = 0,
+) -> dict:
+	"""Return catalog rows changed since `watermark` and the item codes to drop.
+
+	Without a watermark the whole catalog is returned. The new watermark is
+	taken before reading, so anything modified during the request is sent again.
+	"""
+	pos_profile = json.loads(pos_profile)
+	new_watermark = now()
+
+	if not price_list:
+		price_list = pos_profile.get("selling_price_list")
+
+	condition = get_item_group_condition(pos_profile.get("name"))
+	if not pos_profile.get("posa_show_template_items"):
+		condition += " AND has_variants = 0"
+
+	changed, removed = set(), set()
+	if watermark:
+		changed, removed = get_changed_items(
+			get_datetime(watermark), price_list, pos_profile.get("warehouse")
+		)
+		if not changed:
+			items = format_rows([], compact, compress)
+			return {"items": items, "removed": sorted(removed), "watermark": new_watermark}
+		condition += " AND name in ({})".format(", ".join(frappe.db.escape(d) for d in changed))
+
+	items = build_item_rows(pos_profile, get_items_data(condition), price_list, customer)
+	removed |= changed - {d["item_code"] for d in items}
+
+	return {
+		"items": format_rows(items, compact, compress),
+		"removed": sorted(removed),
+		"watermark": new_watermark,
+	}
+
+
+@frappe.whitelist()
+def get_items_page(
+	pos_profile: str,
+	cursor: str | None = None,
+	page_length: int = 500,
+	price_list: str | None = None,
+	customer: str | None = None,
+	compact: int = 0,
+	compress: int = 0,
+) -> dict:
+	"""Return one page of the catalog ordered by `(item_name, name)`.
+
+	`cursor` is the opaque value returned with the previous page; the last
+	page comes back with a null cursor. Items dropped for being out of stock
+	are made up for from the following rows, so pages stay full.
+	"""
+	pos_profile = json.loads(pos_profile)
+	page_length = min(max(cint(page_length), 0) or 500, MAX_PAGE_LENGTH)
+
+	if not price_list:
+		price_list = pos_profile.get("selling_price_list")
+
+	condition = get_item_group_condition(pos_profile.get("name"))
+	if not pos_profile.get("posa_show_template_items"):
+		condition += " AND has_variants = 0"
+
+	rows = []
+	while True:
+		cursor_condition = ""
+		if cursor:
+			item_name, name = json.loads(cursor)
+			cursor_condition = " AND (item_name > {0} OR (item_name = {0} AND name > {1}))".format(
+				frappe.db.escape(item_name), frappe.db.escape(name)
+			)
+
+		items_data = get_items_data(condition + cursor_condition, f" LIMIT {page_length}")
+		rows += build_item_rows(pos_profile, items_data, price_list, customer)
+		if len(items_data) < page_length:
+			cursor = None
+			break
+		cursor = json.dumps([items_data[-1].item_name, items_data[-1].item_code])
+		if len(rows) >= page_length:
+			break
+
+	if len(rows) > page_length:
+		rows = rows[:page_length]
+		cursor = json.dumps([rows[-1]["item_name"], rows[-1]["item_code"]])
+
+	return {
+		"items": format_rows(rows, compact, compress),
+		"cursor": cursor,
+	}
+
+
+@frappe.whitelist()
+def search_items(
+	pos_profile: str,
+	search_value: str,
+	item_group: str = "",
+	price_list: str | None = None,
+	customer: str | None = None,
+) -> list:
+	"""Return catalog rows matching `search_value`, best match first.
+
+	Exact barcode, serial and batch numbers resolve to their item directly;
+	anything else is looked up in the item search index, or matched on item
+	code and name while the index is being built.
+	"""
+	pos_profile = json.loads(pos_profile)
+	search_limit = cint(pos_profile.get("posa_search_limit")) or 500
+
+	if not price_list:
+		price_list = pos_profile.get("selling_price_list")
+
+	data = search_serial_or_batch_or_barcode_number(
+		search_value, pos_profile.get("posa_search_serial_no"), pos_profile.get("posa_scale_barcode_start")
+	)
+	if data.get("item_code"):
+		item_codes = [data.get("item_code")]
+	else:
+		item_codes = search_item_codes(search_value, search_limit)
+	if item_codes is not None and not item_codes:
+		return []
+
+	condition = get_item_group_condition(pos_profile.get("name"))
+	limit = ""
+	if item_codes is None:
+		condition += get_seearch_items_conditions(search_value, "", "", "")
+		limit = f" LIMIT {search_limit}"
+	else:
+		condition += " AND name in ({})".format(", ".join(frappe.db.escape(d) for d in item_codes))
+	if item_group:
+		condition += " AND item_group like {}".format(frappe.db.escape("%" + item_group + "%"))
+	if not pos_profile.get("posa_show_template_items"):
+		condition += " AND has_variants = 0"
+
+	items_data = get_items_data(condition, limit)
+	if item_codes:
+		rank = {item_code: idx for idx, item_code in enumerate(item_codes)}
+		items_data = sorted(items_data, key=lambda d: rank[d.item_code])
+	return build_item_rows(pos_profile, items_data, price_list, customer)
+
+
+def get_items_data(condition, limit=""):
+	return frappe.db.sql(  # nosemgrep: frappe-sql-format-injection
+		# conditions are built from frappe.db.escape() values, not raw user input
+		"""
             SELECT
                 name AS item_code,
                 item_name,
@@ -203,131 +412,18 @@ def get_items(
                     AND is_sales_item = 1
                     AND is_fixed_asset = 0
                     """
-			+ condition
-			+ """
+		+ condition
+		+ """
             ORDER BY
-                item_name asc
+                item_name asc, name asc
             """
-			+ limit,
-			as_dict=1,
-		)
-
-		if items_data:
-			items = [d.item_code for d in items_data]
-			item_prices_data = frappe.get_all(
-				"Item Price",
-				fields=["item_code", "price_list_rate", "currency", "uom"],
-				filters={
-					"price_list": price_list,
-					"item_code": ["in", items],
-					"currency": pos_profile.get("currency"),
-					"selling": 1,
-					"valid_from": ["<=", today],
-					"customer": ["in", ["", None, customer]],
-				},
-				or_filters=[
-					["valid_upto", ">=", today],
-					["valid_upto", "in", ["", None]],
-				],
-				order_by="valid_from ASC, valid_upto DESC",
-			)
-
-			item_prices = {}
-			for d in item_prices_data:
-				item_prices.setdefault(d.item_code, {})
-				item_prices[d.item_code][d.get("uom") or "None"] = d
-
-			for item in items_data:
-				item_code = item.item_code
-				item_price = {}
-				if item_prices.get(item_code):
-					item_price = (
-						item_prices.get(item_code).get(item.stock_uom)
-						or item_prices.get(item_code).get("None")
-						or {}
-					)
-				item_barcode = frappe.get_all(
-					"Item Barcode",
-					filters={"parent": item_code},
-					fields=["barcode", "posa_uom"],
-				)
-				batch_no_data = []
-				if search_batch_no:
-					batch_list = get_batch_qty(warehouse=warehouse, item_code=item_code)
-					if batch_list:
-						for batch in batch_list:
-							if batch.qty > 0 and batch.batch_no:
-								batch_doc = frappe.get_cached_doc("Batch", batch.batch_no)
-								if (
-									str(batch_doc.expiry_date) > str(today)
-									or batch_doc.expiry_date in ["", None]
-								) and batch_doc.disabled == 0:
-									batch_no_data.append(
-										{
-											"batch_no": batch.batch_no,
-											"batch_qty": batch.qty,
-											"expiry_date": batch_doc.expiry_date,
-											"batch_price": batch_doc.posa_batch_price,
-											"manufacturing_date": batch_doc.manufacturing_date,
-										}
-									)
-				serial_no_data = []
-				if search_serial_no:
-					serial_no_data = frappe.get_all(
-						"Serial No",
-						filters={
-							"item_code": item_code,
-							"status": "Active",
-							"warehouse": warehouse,
-						},
-						fields=["name as serial_no"],
-					)
-				item_stock_qty = 0
-				if pos_profile.get("posa_display_items_in_stock") or use_limit_search:
-					item_stock_qty = get_stock_availability(item_code, pos_profile.get("warehouse"))
-				attributes = ""
-				if pos_profile.get("posa_show_template_items") and item.has_variants:
-					attributes = get_item_attributes(item.item_code)
-				item_attributes = ""
-				if pos_profile.get("posa_show_template_items") and item.variant_of:
-					item_attributes = frappe.get_all(
-						"Item Variant Attribute",
-						fields=["attribute", "attribute_value"],
-						filters={"parent": item.item_code, "parentfield": "attributes"},
-					)
-				if posa_display_items_in_stock and (not item_stock_qty or item_stock_qty < 0):
-					pass
-				else:
-					row = {}
-					row.update(item)
-					row.update(
-						{
-							"rate": item_price.get("price_list_rate") or 0,
-							"currency": item_price.get("currency") or pos_profile.get("currency"),
-							"item_barcode": item_barcode or [],
-							"actual_qty": item_stock_qty or 0,
-							"serial_no_data": serial_no_data or [],
-							"batch_no_data": batch_no_data or [],
-							"attributes": attributes or "",
-							"item_attributes": item_attributes or "",
-						}
-					)
-					result.append(row)
-		return result
-
-	if _pos_profile.get("posa_use_server_cache"):
-		return __get_items(pos_profile, price_list, item_group, search_value, customer)
-	else:
-		return _get_items(pos_profile, price_list, item_group, search_value, customer)
+		+ limit,
+		as_dict=1,
+	)
 
 
 def get_item_group_condition(pos_profile):
-	cond = " and 1=1"
-	item_groups = get_item_groups(pos_profile)
-	if item_groups:
-		cond = " and item_group in (%s)" % (", ".join(["%s"] * len(item_groups)))  # noqa: UP031
-
-	return cond % tuple(item_groups)
+	return get_item_group_range_condition(pos_profile)
 
 
 def get_root_of(doctype):
@@ -336,40 +432,43 @@ def get_root_of(doctype):
 	if not frappe.db.exists("DocType", doctype):
 		frappe.throw(_("Invalid DocType: {0}").format(doctype))
 
+	# The root is the node with the smallest lft, no need to count ancestors per node
 	result = frappe.db.sql(  # nosemgrep: frappe-sql-format-injection
 		# table name interpolation cannot use parameterized queries;
 		# doctype is validated above against the DocType table
-		"""select t1.name from `tab{doctype}` t1 where
-		(select count(*) from `tab{doctype}` t2 where
-			t2.lft < t1.lft and t2.rgt > t1.rgt) = 0
-		and t1.rgt > t1.lft""".format(doctype=doctype)  # noqa: UP032
+		"""select name from `tab{doctype}` where rgt > lft
+		order by lft asc limit 1""".format(doctype=doctype)  # noqa: UP032
 	)
 	return result[0][0] if result else None
 
 
 @frappe.whitelist()
-def get_items_groups() -> list:
-	return frappe.db.sql(
-		"""
-        select name
-        from `tabItem Group`
-        where is_group = 0
-        order by name
-        LIMIT 0, 200 """,
-		as_dict=1,
-	)
+def get_items_groups(version: str | None = None) -> list | dict:
+	def _get_items_groups():
+		return frappe.db.sql(
+			"""
+            select name
+            from `tabItem Group`
+            where is_group = 0
+            order by name
+            LIMIT 0, 200 """,
+			as_dict=1,
+		)
+
+	return versioned(["item_groups"], version, _get_items_groups)
 
 
 def get_customer_groups(pos_profile):
+	return [f"{frappe.db.escape(d)}" for d in get_customer_group_names(pos_profile)]
+
+
+def get_customer_group_names(pos_profile):
 	customer_groups = []
 	if pos_profile.get("customer_groups"):
-		# Get items based on the item groups defined in the POS profile
+		# Get customers based on the customer groups defined in the POS profile
 		for data in pos_profile.get("customer_groups"):
 			customer_groups.extend(
-				[
-					f"{frappe.db.escape(d.get('name'))}"
-					for d in get_child_nodes("Customer Group", data.get("customer_group"))
-				]
+				[d.get("name") for d in get_child_nodes("Customer Group", data.get("customer_group"))]
 			)
 
 	return list(set(customer_groups))
@@ -399,79 +498,149 @@ def get_customer_group_condition(pos_profile):
 
 
 @frappe.whitelist()
-def get_customer_names(pos_profile: str) -> list:
-	_pos_profile = json.loads(pos_profile)
-	ttl = _pos_profile.get("posa_server_cache_duration")
-	if ttl:
-		ttl = int(ttl) * 60
-
-	@redis_cache(ttl=ttl or 1800)
-	def __get_customer_names(pos_profile):
-		return _get_customer_names(pos_profile)
-
-	def _get_customer_names(pos_profile):
-		pos_profile = json.loads(pos_profile)
-		condition = ""
-		condition += get_customer_group_condition(pos_profile)
-		customers = frappe.db.sql(  # nosemgrep: frappe-sql-format-injection
-			# conditions are built from frappe.db.escape() values, not raw user input
-			"""
-            SELECT name, mobile_no, email_id, tax_id, customer_name, primary_address
-            FROM `tabCustomer`
-            WHERE """
-			+ condition
-			+ """
-            ORDER by name
-            """,
-			as_dict=1,
+def get_customer_names(pos_profile: str, version: str | None = None) -> list | dict:
+	pos_profile = json.loads(pos_profile)
+
+	def _get_customer_names():
+		return get_customer_rows(get_customer_group_condition(pos_profile))
+
+	def _get_cached_customer_names():
+		if pos_profile.get("posa_use_server_cache"):
+			ttl = cint(pos_profile.get("posa_server_cache_duration")) * 60
+			fingerprint = get_profile_fingerprint("customers", pos_profile)
+			return get_cached("customers", fingerprint, _get_customer_names, ttl or 1800)
+		else:
+			return _get_customer_names()
+
+	return versioned(
+		["customers"],
+		version,
+		_get_cached_customer_names,
+		get_profile_fingerprint("customers", pos_profile),
+	)
+
+
+def get_customer_rows(condition, limit=""):
+	return frappe.db.sql(  # nosemgrep: frappe-sql-format-injection
+		# conditions are built from frappe.db.escape() values, not raw user input
+		"""
+        SELECT name, mobile_no, email_id, tax_id, customer_name, primary_address
+        FROM `tabCustomer`
+        WHERE """
+		+ condition
+		+ """
+        ORDER by name
+        """
+		+ limit,
+		as_dict=1,
+	)
+
+
+@frappe.whitelist()
+def get_customers_delta(pos_profile: str, watermark: str | None = None) -> dict:
+	"""Return customers changed since `watermark` and the names to drop.
+
+	Without a watermark every allowed customer is returned. The new watermark
+	is taken before reading, so anything modified during the request is sent again.
+	"""
+	pos_profile = json.loads(pos_profile)
+	new_watermark = now()
+	condition = get_customer_group_condition(pos_profile)
+
+	changed, removed = set(), set()
+	if watermark:
+		watermark = get_datetime(watermark)
+		changed = set(frappe.get_all("Customer", filters={"modified": [">", watermark]}, pluck="name"))
+		removed = set(
+			frappe.get_all(
+				"Deleted Document",
+				filters={"deleted_doctype": "Customer", "creation": [">", watermark]},
+				pluck="deleted_name",
+			)
 		)
-		return customers
+		if not changed:
+			return {"customers": [], "removed": sorted(removed), "watermark": new_watermark}
+		condition += " AND name in ({})".format(", ".join(frappe.db.escape(d) for d in changed))
 
-	if _pos_profile.get("posa_use_server_cache"):
-		return __get_customer_names(pos_profile)
-	else:
-		return _get_customer_names(pos_profile)
+	customers = get_customer_rows(condition)
+	# Customers moved out of the profile's groups are dropped as well
+	removed |= changed - {d.name for d in customers}
+
+	return {"customers": customers, "removed": sorted(removed), "watermark": new_watermark}
 
 
 @frappe.whitelist()
-def get_sales_person_names() -> list:
-	sales_persons = frappe.get_list(
-		"Sales Person",
-		filters={"enabled": 1},
-		fields=["name", "sales_person_name"],
-		limit_page_length=100000,
-	)
-	return sales_persons
-
-
-def add_taxes_from_tax_template(item, parent_doc):
-	accounts_settings = frappe.get_cached_doc("Accounts Settings")
-	add_taxes_from_item_tax_template = accounts_settings.add_taxes_from_item_tax_template
-	if item.get("item_tax_template") and add_taxes_from_item_tax_template:
-		item_tax_template = item.get("item_tax_template")
-		taxes_template_details = frappe.get_all(
-			"Item Tax Template Detail",
-			filters={"parent": item_tax_template},
-			fields=["tax_type"],
+def search_customers(pos_profile: str, search_value: str, limit: int = 20) -> list:
+	"""Return the profile's customers matching `search_value` on name, mobile, email or tax id."""
+	pos_profile = json.loads(pos_profile)
+	limit = cint(limit) or 20
+	names = search_customer_names(search_value, get_customer_group_names(pos_profile), limit)
+	condition = get_customer_group_condition(pos_profile)
+	if names is None:
+		# The search index is still being built
+		value = frappe.db.escape("%" + search_value.strip() + "%")
+		fields = ("name", "customer_name", "mobile_no", "email_id", "tax_id")
+		condition += " AND ({})".format(" OR ".join(f"{field} like {value}" for field in fields))
+		return get_customer_rows(condition, f" LIMIT {limit}")
+	if not names:
+		return []
+
+	condition += " AND name in ({})".format(", ".join(frappe.db.escape(d) for d in names))
+	rank = {name: idx for idx, name in enumerate(names)}
+	return sorted(get_customer_rows(condition), key=lambda d: rank[d.name])
+
+
+@frappe.whitelist()
+def get_sales_person_names(version: str | None = None) -> list | dict:
+	def _get_sales_person_names():
+		sales_persons = frappe.get_list(
+			"Sales Person",
+			filters={"enabled": 1},
+			fields=["name", "sales_person_name"],
+			limit_page_length=100000,
 		)
+		return sales_persons
 
-		for tax_detail in taxes_template_details:
-			tax_type = tax_detail.get("tax_type")
-
-			found = any(tax.account_head == tax_type for tax in parent_doc.taxes)
-			if not found:
-				tax_row = parent_doc.append("taxes", {})
-				tax_row.update(
-					{
-						"description": str(tax_type).split(" - ")[0],
-						"charge_type": "On Net Total",
-						"account_head": tax_type,
-					}
-				)
+	# get_list applies user permissions, so the token is per user
+	return versioned(["sales_persons"], version, _get_sales_person_names, frappe.session.user)
+
+
+def add_taxes_from_tax_template(parent_doc):
+	"""Append a tax row for every tax type of the item tax templates used on `parent_doc`."""
+	if not frappe.get_cached_doc("Accounts Settings").add_taxes_from_item_tax_template:
+		return
+
+	templates = list(
+		dict.fromkeys(d.item_tax_template for d in parent_doc.items if d.get("item_tax_template"))
+	)
+	if not templates:
+		return
+
+	tax_types = {}
+	for row in frappe.get_all(
+		"Item Tax Template Detail",
+		filters={"parenttype": "Item Tax Template", "parent": ["in", templates]},
+		fields=["parent", "tax_type"],
+		order_by="idx asc",
+	):
+		tax_types.setdefault(row.parent, []).append(row.tax_type)
 
-				if parent_doc.doctype == "Purchase Order":
-					tax_row.update({"category": "Total", "add_deduct_tax": "Add"})
-				tax_row.db_insert()
+	existing = {tax.account_head for tax in parent_doc.taxes}
+	for template in templates:
+		for tax_type in tax_types.get(template, []):
+			if tax_type in existing:
+				continue
+			existing.add(tax_type)
+			tax_row = parent_doc.append(
+				"taxes",
+				{
+					"description": str(tax_type).split(" - ")[0],
+					"charge_type": "On Net Total",
+					"account_head": tax_type,
+				},
+			)
+			if parent_doc.doctype == "Purchase Order":
+				tax_row.update({"category": "Total", "add_deduct_tax": "Add"})
 
 
 @frappe.whitelist()
@@ -484,8 +653,26 @@ def update_invoice_from_order(data: str):
 
 
 @frappe.whitelist()
-def update_invoice(data: str):
-	data = json.loads(data)
+def update_invoice(data: str, request_key: str | None = None):
+	def _update_invoice():
+		invoice_doc = build_invoice(json.loads(data))
+		invoice_doc.save()
+		return invoice_doc
+
+	return run_once(request_key, "update_invoice", _update_invoice, "Sales Invoice")
+
+
+@frappe.whitelist()
+def preview_invoice(data: str):
+	"""Return the invoice `data` checks out as, with its taxes and totals, without saving it.
+
+	The payment screen is filled from this, and `checkout` writes the invoice once.
+	"""
+	return build_invoice(json.loads(data))
+
+
+def build_invoice(data):
+	"""Create or update a draft Sales Invoice from POS `data` and compute its totals, without saving."""
 	incoming_customer = data.get("customer")
 	if data.get("name"):
 		invoice_doc = frappe.get_doc("Sales Invoice", data.get("name"))
@@ -513,135 +700,10 @@ def update_invoice(data: str):
 
 	# Map custom accounting dimensions and custom fields from POS Profile to Sales Invoice
 	if invoice_doc.pos_profile and invoice_doc.is_pos:
-		# Get meta objects once (cached by Frappe, but explicit for clarity)
-		pos_profile_meta = frappe.get_meta("POS Profile")
-		sales_invoice_meta = frappe.get_meta("Sales Invoice")
-
-		accounting_dimensions_fields = []
-		accounting_dimensions = []
-		all_fields_to_fetch = []
-
-		# Step 1: Handle accounting dimensions (custom + standard)
-		try:
-			accounting_dimensions = get_accounting_dimensions(as_list=False, filters={"disabled": 0})
-			accounting_dimensions_fields = [d.fieldname for d in accounting_dimensions]
-
-			# Include standard dimensions
-			standard_dimensions = ["cost_center", "project"]
-			all_dimension_fields = accounting_dimensions_fields + standard_dimensions
-			all_fields_to_fetch.extend(all_dimension_fields)
-		except Exception as e:
-			frappe.log_error(
-				message=f"Error getting accounting dimensions: {e!s}", title="Accounting Dimensions Error"
-			)
-			# Fallback to standard dimensions only
-			accounting_dimensions = []
-			accounting_dimensions_fields = []
-			all_dimension_fields = ["cost_center", "project"]
-			all_fields_to_fetch.extend(all_dimension_fields)
-
-		# Step 2: Prepare custom fields to fetch (excluding accounting dimensions and standard fields)
-		custom_fields_to_copy = set()
-		try:
-			# Exclude layout/non-data fieldtypes (these don't have values to copy)
-			excluded_fieldtypes = {"Section Break", "Column Break", "Tab Break", "HTML", "Button", "Table"}
-
-			# Exclude fields already handled by set_pos_fields() or system fields
-			# These are set by ERPNext's set_pos_fields() method called earlier via set_missing_values()
-			fields_handled_by_set_pos_fields = {
-				"currency",
-				"letter_head",
-				"tc_name",
-				"company",
-				"select_print_heading",
-				"write_off_account",
-				"taxes_and_charges",
-				"write_off_cost_center",
-				"apply_discount_on",
-				"cost_center",
-				"tax_category",
-				"ignore_pricing_rule",
-				"company_address",
-				"account_for_change_amount",
-			}
-			# System/metadata fields that shouldn't be copied
-			system_fields = {
-				"name",
-				"owner",
-				"creation",
-				"modified",
-				"modified_by",
-				"docstatus",
-				"company",
-				"customer",
-				"is_pos",
-				"pos_profile",
-			}
-			excluded_fields = fields_handled_by_set_pos_fields | system_fields
-
-			# Get field sets for both doctypes (only data fields, not read-only)
-			pos_profile_fields = {
-				f.fieldname
-				for f in pos_profile_meta.fields
-				if f.fieldtype not in excluded_fieldtypes and not f.read_only
-			}
-			sales_invoice_fields = {
-				f.fieldname
-				for f in sales_invoice_meta.fields
-				if f.fieldtype not in excluded_fieldtypes and not f.read_only
-			}
-
-			# Find common fields and exclude already handled ones
-			accounting_dimension_fields_set = set(accounting_dimensions_fields) | {"cost_center", "project"}
-			custom_fields_to_copy = (
-				(pos_profile_fields & sales_invoice_fields)
-				- excluded_fields
-				- accounting_dimension_fields_set
-			)
-
-			if custom_fields_to_copy:
-				all_fields_to_fetch.extend(custom_fields_to_copy)
-		except Exception as e:
-			frappe.log_error(
-				message=f"Error preparing custom fields: {e!s}", title="Custom Fields Preparation Error"
-			)
-
-		# Step 3: Fetch all field values from POS Profile in a single query
-		if all_fields_to_fetch:
-			try:
-				pos_profile_values = frappe.db.get_value(
-					"POS Profile",
-					invoice_doc.pos_profile,
-					list(set(all_fields_to_fetch)),  # Remove duplicates
-					as_dict=1,
-				)
-
-				if pos_profile_values:
-					# Direct mapping: Copy accounting dimensions and custom fields from POS Profile
-					# This includes profit_center and any other accounting dimension/custom fields
-					# Build set of fields we want to copy (accounting dimensions + custom fields)
-					fields_to_copy = (
-						set(accounting_dimensions_fields) | {"cost_center", "project"} | custom_fields_to_copy
-					)
-
-					for fieldname in fields_to_copy:
-						# Skip if already set on invoice (preserve user-entered values)
-						if invoice_doc.get(fieldname):
-							continue
-
-						# Verify field exists on Sales Invoice before setting
-						if not sales_invoice_meta.has_field(fieldname):
-							continue
-
-						value = pos_profile_values.get(fieldname)
-						# Set the value if it exists and is not empty
-						if value is not None and value != "":
-							invoice_doc.set(fieldname, value)
-			except Exception as e:
-				frappe.log_error(
-					message=f"Error mapping fields from POS Profile to Sales Invoice: {e!s}",
-					title="POS Profile Field Mapping Error",
-				)
+		for fieldname, value in get_profile_field_values(invoice_doc.pos_profile).items():
+			# Skip if already set on invoice (preserve user-entered values)
+			if not invoice_doc.get(fieldname):
+				invoice_doc.set(fieldname, value)
 
 	if invoice_doc.is_return and invoice_doc.return_against:
 		ref_doc = frappe.get_cached_doc(invoice_doc.doctype, invoice_doc.return_against)
@@ -670,7 +732,7 @@ def update_invoice(data: str):
 				frappe.throw(_("Rate cannot be zero for item {0}").format(item.item_code))
 		else:
 			item.is_free_item = 0
-		add_taxes_from_tax_template(item, invoice_doc)
+	add_taxes_from_tax_template(invoice_doc)
 
 	if invoice_doc.get("inclusive_tax"):
 		invoice_doc.ignore_pricing_rule = 1
@@ -699,16 +761,96 @@ def update_invoice(data: str):
 	if invoice_doc.get("posting_date") and getdate(invoice_doc.posting_date) != today_date:
 		invoice_doc.set_posting_time = 1
 
-	invoice_doc.save()
 	return invoice_doc
 
 
 @frappe.whitelist()
-def submit_invoice(invoice: str, data: str) -> dict:
-	data = json.loads(data)
-	invoice = json.loads(invoice)
-	invoice_doc = frappe.get_doc("Sales Invoice", invoice.get("name"))
-	invoice_doc.update(invoice)
+def submit_invoice(invoice: str, data: str, request_key: str | None = None) -> dict:
+	def _submit_invoice():
+		invoice_data = json.loads(invoice)
+		invoice_doc = frappe.get_doc("Sales Invoice", invoice_data.get("name"))
+		invoice_doc.update(invoice_data)
+		return complete_invoice(invoice_doc, invoice_data, json.loads(data))
+
+	return run_once(request_key, "submit_invoice", _submit_invoice, "Sales Invoice")
+
+
+@frappe.whitelist()
+def checkout(invoice: str, data: str, request_key: str | None = None) -> dict:
+	"""Build, validate and submit a POS invoice from one payload.
+
+	Unlike `update_invoice` followed by `submit_invoice`, the invoice is written
+	once, when it is submitted, in the same request and transaction. A replayed
+	`request_key` returns the result of the first request.
+	"""
+	return run_once(
+		request_key,
+		"checkout",
+		lambda: checkout_invoice(json.loads(invoice), json.loads(data)),
+		"Sales Invoice",
+	)
+
+
+def checkout_invoice(invoice, data):
+	invoice_doc = build_invoice(invoice)
+	if invoice_doc.is_new() and has_product_bundles(invoice_doc):
+		# Packed items, whose batches are set before submit, only exist once the invoice is validated
+		invoice_doc.insert()
+	return complete_invoice(invoice_doc, invoice, data, save_draft=False)
+
+
+@frappe.whitelist()
+def sync_invoices(invoices: str) -> list:
+	"""Check out invoices kept by an offline terminal and return `{client_id, status, name, message}` each.
+
+	`invoices` is a list of `{client_id, invoice, data}` with `checkout` arguments. The
+	batch runs in one transaction, each invoice under its own savepoint so a failing
+	one is rolled back alone. `client_id` is used as the request key, so invoices sent
+	again after a lost response are not posted twice.
+	"""
+	invoices = json.loads(invoices)
+	if len(invoices) > SYNC_BATCH_SIZE:
+		frappe.throw(_("Cannot sync more than {0} invoices at once").format(SYNC_BATCH_SIZE))
+
+	results = []
+	for row in invoices:
+		client_id = row.get("client_id")
+		if not client_id:
+			results.append({"client_id": None, "status": "error", "message": _("Missing client id")})
+			continue
+
+		frappe.db.savepoint("pospire_sync_invoice")
+		try:
+			response = run_once(
+				client_id,
+				"checkout",
+				lambda row=row: checkout_invoice(row.get("invoice"), row.get("data") or {}),
+				"Sales Invoice",
+			)
+		except Exception as e:
+			frappe.db.rollback(save_point="pospire_sync_invoice")
+			# Reported in the result instead of as messages of the whole request
+			frappe.clear_messages()
+			results.append({"client_id": client_id, "status": "error", "message": str(e) or type(e).__name__})
+			continue
+
+		results.append({"client_id": client_id, "status": "ok", "name": response.get("name")})
+	return results
+
+
+def has_product_bundles(invoice_doc):
+	item_codes = list({d.item_code for d in invoice_doc.items if d.item_code})
+	return bool(
+		item_codes
+		and frappe.db.exists("Product Bundle", {"new_item_code": ["in", item_codes], "disabled": 0})
+	)
+
+
+def complete_invoice(invoice_doc, invoice, data, save_draft=True):
+	"""Apply payment `data` to `invoice_doc` and submit it, or queue it for background submission.
+
+	With `save_draft` unset the invoice is submitted directly, without first saving it as a draft.
+	"""
 	if invoice.get("posa_delivery_date"):
 		invoice_doc.update_stock = 0
 	mop_cash_list = [
@@ -757,60 +899,70 @@ def submit_invoice(invoice: str, data: str) -> dict:
 	is_payment_entry = 0
 	if data.get("redeemed_customer_credit"):
 		total_cash = invoice_doc.total - float(data.get("redeemed_customer_credit"))
-		for row in data.get("customer_credit_dict"):
-			if row["type"] == "Advance" and row["credit_to_redeem"]:
-				advance = frappe.get_doc("Payment Entry", row["credit_origin"])
-				advance_payment = {
-					"reference_type": "Payment Entry",
-					"reference_name": advance.name,
-					"remarks": advance.remarks,
-					"advance_amount": advance.unallocated_amount,
-					"allocated_amount": row["credit_to_redeem"],
-				}
-				invoice_doc.append("advances", advance_payment)
-				invoice_doc.is_pos = 0
-				is_payment_entry = 1
+		advances = [
+			row
+			for row in data.get("customer_credit_dict")
+			if row["type"] == "Advance" and row["credit_to_redeem"]
+		]
+		ledger = {
+			row.credit_origin: row
+			for row in get_credit_ledger(
+				invoice_doc.customer, invoice_doc.company, [row["credit_origin"] for row in advances]
+			)
+		}
+		for row in advances:
+			advance = ledger.get(row["credit_origin"])
+			if not advance:
+				frappe.throw(_("Payment Entry {0} has no credit left to redeem").format(row["credit_origin"]))
+			if flt(row["credit_to_redeem"]) > advance.total_credit:
+				frappe.throw(
+					_("Cannot redeem {0} from Payment Entry {1}, only {2} is left").format(
+						row["credit_to_redeem"], row["credit_origin"], advance.total_credit
+					)
+				)
+			advance_payment = {
+				"reference_type": "Payment Entry",
+				"reference_name": advance.credit_origin,
+				"remarks": advance.remarks,
+				"advance_amount": advance.total_credit,
+				"allocated_amount": row["credit_to_redeem"],
+			}
+			invoice_doc.append("advances", advance_payment)
+			invoice_doc.is_pos = 0
+			is_payment_entry = 1
 
 	set_batch_nos_for_bundels(invoice_doc, "warehouse", throw=True)
 
 	invoice_doc.flags.ignore_permissions = True
 	frappe.flags.ignore_account_permission = True
 	invoice_doc.posa_is_printed = 1
-	invoice_doc.save()
 
-	if data.get("due_date"):
-		frappe.db.set_value(
-			"Sales Invoice",
-			invoice_doc.name,
-			"due_date",
-			data.get("due_date"),
-			update_modified=False,
-		)
+	in_background = frappe.get_value(
+		"POS Profile", invoice_doc.pos_profile, "posa_allow_submissions_in_background_job"
+	)
+	if save_draft or in_background:
+		invoice_doc.save()
+
+		if data.get("due_date"):
+			frappe.db.set_value(
+				"Sales Invoice",
+				invoice_doc.name,
+				"due_date",
+				data.get("due_date"),
+				update_modified=False,
+			)
 
-	if frappe.get_value("POS Profile", invoice_doc.pos_profile, "posa_allow_submissions_in_background_job"):
-		invoices_list = frappe.get_all(
-			"Sales Invoice",
-			filters={
-				"posa_pos_opening_shift": invoice_doc.posa_pos_opening_shift,
-				"docstatus": 0,
-				"posa_is_printed": 1,
+	if in_background:
+		submission_queue.queue_invoice(
+			invoice_doc.name,
+			invoice_doc.posa_pos_opening_shift,
+			{
+				"data": data,
+				"is_payment_entry": is_payment_entry,
+				"total_cash": total_cash,
+				"cash_account": cash_account,
 			},
 		)
-		for invoice in invoices_list:
-			enqueue(
-				method=submit_in_background_job,
-				queue="short",
-				timeout=1000,
-				is_async=True,
-				kwargs={
-					"invoice": invoice.name,
-					"data": data,
-					"is_payment_entry": is_payment_entry,
-					"total_cash": total_cash,
-					"cash_account": cash_account,
-					"payments": invoice_doc.payments,
-				},
-			)
 	else:
 		invoice_doc.submit()
 		if invoice_doc.is_return and invoice_doc.return_against and not is_cashback:
@@ -862,47 +1014,13 @@ def redeeming_customer_credit(invoice_doc, data, is_payment_entry, total_cash, c
 			cost_center = frappe.get_value("Company", invoice_doc.company, "cost_center")
 		if not cost_center:
 			frappe.throw(_("Cost Center is not set in pos profile {}").format(invoice_doc.pos_profile))
-		for row in data.get("customer_credit_dict"):
-			if row["type"] == "Invoice" and row["credit_to_redeem"]:
-				outstanding_invoice = frappe.get_doc("Sales Invoice", row["credit_origin"])
-
-				jv_doc = frappe.get_doc(
-					{
-						"doctype": "Journal Entry",
-						"voucher_type": "Journal Entry",
-						"posting_date": today,
-						"company": invoice_doc.company,
-					}
-				)
-
-				jv_debit_entry = {
-					"account": outstanding_invoice.debit_to,
-					"party_type": "Customer",
-					"party": invoice_doc.customer,
-					"reference_type": "Sales Invoice",
-					"reference_name": outstanding_invoice.name,
-					"debit_in_account_currency": row["credit_to_redeem"],
-					"cost_center": cost_center,
-				}
-
-				jv_credit_entry = {
-					"account": invoice_doc.debit_to,
-					"party_type": "Customer",
-					"party": invoice_doc.customer,
-					"reference_type": "Sales Invoice",
-					"reference_name": invoice_doc.name,
-					"credit_in_account_currency": row["credit_to_redeem"],
-					"cost_center": cost_center,
-				}
-
-				jv_doc.append("accounts", jv_debit_entry)
-				jv_doc.append("accounts", jv_credit_entry)
-
-				jv_doc.flags.ignore_permissions = True
-				frappe.flags.ignore_account_permission = True
-				jv_doc.set_missing_values()
-				jv_doc.save()
-				jv_doc.submit()
+		credit_notes = [
+			row
+			for row in data.get("customer_credit_dict")
+			if row["type"] == "Invoice" and row["credit_to_redeem"]
+		]
+		if credit_notes:
+			make_credit_redemption_entry(invoice_doc, credit_notes, cost_center, today)
 
 	if is_payment_entry and total_cash > 0:
 		for payment in payments:
@@ -940,77 +1058,77 @@ def redeeming_customer_credit(invoice_doc, data, is_payment_entry, total_cash, c
 			payment_entry_doc.submit()
 
 
-def submit_in_background_job(kwargs):
-	invoice = kwargs.get("invoice")
-	invoice_doc = kwargs.get("invoice_doc")
-	data = kwargs.get("data")
-	is_payment_entry = kwargs.get("is_payment_entry")
-	total_cash = kwargs.get("total_cash")
-	cash_account = kwargs.get("cash_account")
-	payments = kwargs.get("payments")
-
-	invoice_doc = frappe.get_doc("Sales Invoice", invoice)
-	invoice_doc.submit()
-	redeeming_customer_credit(invoice_doc, data, is_payment_entry, total_cash, cash_account, payments)
-
-
-@frappe.whitelist()
-def get_available_credit(customer: str, company: str) -> list:
-	"""
-	Get available customer credit from two sources:
-	1. Credit Notes (Return Invoices with outstanding credit)
-	2. Advance Payments (Unallocated payment entries)
-	"""
-	total_credit = []
+def make_credit_redemption_entry(invoice_doc, credit_notes, cost_center, posting_date):
+	"""Post one Journal Entry moving the redeemed credit of every credit note onto `invoice_doc`."""
+	ledger = {
+		row.credit_origin: row
+		for row in get_credit_ledger(
+			invoice_doc.customer, invoice_doc.company, [row["credit_origin"] for row in credit_notes]
+		)
+	}
+	for row in credit_notes:
+		if row["credit_origin"] not in ledger:
+			frappe.throw(_("Credit Note {0} has no credit left to redeem").format(row["credit_origin"]))
+		if flt(row["credit_to_redeem"]) > ledger[row["credit_origin"]].total_credit:
+			frappe.throw(
+				_("Cannot redeem {0} from Credit Note {1}, only {2} is left").format(
+					row["credit_to_redeem"], row["credit_origin"], ledger[row["credit_origin"]].total_credit
+				)
+			)
 
-	# Get credit from Credit Notes (Return Invoices)
-	credit_notes = frappe.get_all(
-		"Sales Invoice",
+	jv_doc = frappe.get_doc(
 		{
-			"outstanding_amount": ["<", 0],  # Has available credit (negative outstanding)
-			"docstatus": 1,
-			"is_return": 1,  # Only return invoices (credit notes)
-			"customer": customer,
-			"company": company,
-		},
-		["name", "outstanding_amount", "return_against"],
+			"doctype": "Journal Entry",
+			"voucher_type": "Journal Entry",
+			"posting_date": posting_date,
+			"company": invoice_doc.company,
+		}
 	)
-
+	total_redeemed = 0
 	for row in credit_notes:
-		outstanding_amount = -(row.outstanding_amount)  # Convert to positive for display
-		credit_entry = {
-			"type": "Invoice",  # Keep as "Invoice" for compatibility with redemption code
-			"credit_origin": row.name,
-			"total_credit": outstanding_amount,
-			"credit_to_redeem": 0,
-			"return_against": row.return_against,  # Reference to original invoice
-		}
-
-		total_credit.append(credit_entry)
+		jv_doc.append(
+			"accounts",
+			{
+				"account": ledger[row["credit_origin"]].account,
+				"party_type": "Customer",
+				"party": invoice_doc.customer,
+				"reference_type": "Sales Invoice",
+				"reference_name": row["credit_origin"],
+				"debit_in_account_currency": row["credit_to_redeem"],
+				"cost_center": cost_center,
+			},
+		)
+		total_redeemed += flt(row["credit_to_redeem"])
 
-	advances = frappe.get_all(
-		"Payment Entry",
+	jv_doc.append(
+		"accounts",
 		{
-			"unallocated_amount": [">", 0],
+			"account": invoice_doc.debit_to,
 			"party_type": "Customer",
-			"party": customer,
-			"company": company,
-			"docstatus": 1,
+			"party": invoice_doc.customer,
+			"reference_type": "Sales Invoice",
+			"reference_name": invoice_doc.name,
+			"credit_in_account_currency": total_redeemed,
+			"cost_center": cost_center,
 		},
-		["name", "unallocated_amount"],
 	)
 
-	for row in advances:
-		row = {
-			"type": "Advance",
-			"credit_origin": row.name,
-			"total_credit": row.unallocated_amount,
-			"credit_to_redeem": 0,
-		}
+	jv_doc.flags.ignore_permissions = True
+	frappe.flags.ignore_account_permission = True
+	jv_doc.set_missing_values()
+	# Inserted as submitted, one write
+	jv_doc.submit()
+	return jv_doc
 
-		total_credit.append(row)
 
-	return total_credit
+@frappe.whitelist()
+def get_available_credit(customer: str, company: str) -> list:
+	"""
+	Get available customer credit from two sources:
+	1. Credit Notes (Return Invoices with outstanding credit)
+	2. Advance Payments (Unallocated payment entries)
+	"""
+	return get_credit_ledger(customer, company)
 
 
 @frappe.whitelist()
@@ -1042,87 +1160,49 @@ def delete_invoice(invoice: str) -> str:
 
 @frappe.whitelist()
 def get_items_details(pos_profile: str, items_data: str) -> list:
-	_pos_profile = json.loads(pos_profile)
-	ttl = _pos_profile.get("posa_server_cache_duration")
-	if ttl:
-		ttl = int(ttl) * 60
-
-	@redis_cache(ttl=ttl or 1800)
-	def __get_items_details(pos_profile, items_data):
-		return _get_items_details(pos_profile, items_data)
-
-	def _get_items_details(pos_profile, items_data):
-		today = nowdate()
-		pos_profile = json.loads(pos_profile)
-		items_data = json.loads(items_data)
-		warehouse = pos_profile.get("warehouse")
-		result = []
-
-		if len(items_data) > 0:
-			for item in items_data:
-				item_code = item.get("item_code")
-				item_stock_qty = get_stock_availability(item_code, warehouse)
-				(has_batch_no, has_serial_no) = frappe.db.get_value(
-					"Item", item_code, ["has_batch_no", "has_serial_no"]
-				)
-				uoms = frappe.get_all(
-					"UOM Conversion Detail",
-					filters={"parent": item_code},
-					fields=["uom", "conversion_factor"],
-				)
+	pos_profile = json.loads(pos_profile)
+	items_data = json.loads(items_data)
+	warehouse = pos_profile.get("warehouse")
+	result = []
 
-				serial_no_data = frappe.get_all(
-					"Serial No",
-					filters={
-						"item_code": item_code,
-						"status": "Active",
-						"warehouse": warehouse,
-					},
-					fields=["name as serial_no"],
-				)
+	if not items_data:
+		return result
 
-				batch_no_data = []
-
-				batch_list = get_batch_qty(warehouse=warehouse, item_code=item_code)
-
-				if batch_list:
-					for batch in batch_list:
-						if batch.qty > 0 and batch.batch_no:
-							batch_doc = frappe.get_cached_doc("Batch", batch.batch_no)
-							if (
-								str(batch_doc.expiry_date) > str(today) or batch_doc.expiry_date in ["", None]
-							) and batch_doc.disabled == 0:
-								batch_no_data.append(
-									{
-										"batch_no": batch.batch_no,
-										"batch_qty": batch.qty,
-										"expiry_date": batch_doc.expiry_date,
-										"batch_price": batch_doc.posa_batch_price,
-										"manufacturing_date": batch_doc.manufacturing_date,
-									}
-								)
-
-				row = {}
-				row.update(item)
-				row.update(
-					{
-						"item_uoms": uoms or [],
-						"serial_no_data": serial_no_data or [],
-						"batch_no_data": batch_no_data or [],
-						"actual_qty": item_stock_qty or 0,
-						"has_batch_no": has_batch_no,
-						"has_serial_no": has_serial_no,
-					}
-				)
+	item_codes = sorted({item.get("item_code") for item in items_data})
+	if pos_profile.get("posa_use_server_cache"):
+		# Only the Item master part is cached; stock, serials and batches are read live
+		ttl = cint(pos_profile.get("posa_server_cache_duration")) * 60
+		fingerprint = get_profile_fingerprint("items_details", pos_profile, item_codes)
+		item_details = get_cached(
+			"items_details", fingerprint, lambda: get_item_master_details(item_codes), ttl or 1800
+		)
+	else:
+		item_details = get_item_master_details(item_codes)
 
-				result.append(row)
+	stock_qty = get_stock_qty_map(item_codes, warehouse, pos_profile.get("posa_use_server_cache"))
+	serial_nos = get_item_serial_nos(item_codes, warehouse)
+	batch_no_data = get_batch_availability(item_codes, warehouse, pos_profile.get("posa_use_server_cache"))
 
-		return result
+	for item in items_data:
+		item_code = item.get("item_code")
+		details = item_details.get(item_code) or {}
 
-	if _pos_profile.get("posa_use_server_cache"):
-		return __get_items_details(pos_profile, items_data)
-	else:
-		return _get_items_details(pos_profile, items_data)
+		row = {}
+		row.update(item)
+		row.update(
+			{
+				"item_uoms": details.get("item_uoms") or [],
+				"serial_no_data": serial_nos.get(item_code) or [],
+				"batch_no_data": batch_no_data.get(item_code) or [],
+				"actual_qty": stock_qty.get(item_code) or 0,
+				"has_batch_no": details.get("has_batch_no"),
+				"has_serial_no": details.get("has_serial_no"),
+			}
+		)
+
+		result.append(row)
+
+	return result
 
 
 @frappe.whitelist()
@@ -1130,27 +1210,10 @@ def get_item_detail(
 	item: str, doc: str | None = None, warehouse: str | None = None, price_list: str | None = None
 ):
 	item = json.loads(item)
-	today = nowdate()
 	item_code = item.get("item_code")
 	batch_no_data = []
 	if warehouse and item.get("has_batch_no"):
-		batch_list = get_batch_qty(warehouse=warehouse, item_code=item_code)
-		if batch_list:
-			for batch in batch_list:
-				if batch.qty > 0 and batch.batch_no:
-					batch_doc = frappe.get_cached_doc("Batch", batch.batch_no)
-					if (
-						str(batch_doc.expiry_date) > str(today) or batch_doc.expiry_date in ["", None]
-					) and batch_doc.disabled == 0:
-						batch_no_data.append(
-							{
-								"batch_no": batch.batch_no,
-								"batch_qty": batch.qty,
-								"expiry_date": batch_doc.expiry_date,
-								"batch_price": batch_doc.posa_batch_price,
-								"manufacturing_date": batch_doc.manufacturing_date,
-							}
-						)
+		batch_no_data = get_batch_availability([item_code], warehouse).get(item_code) or []
 
 	item["selling_price_list"] = price_list
 
@@ -1168,20 +1231,7 @@ def get_item_detail(
 
 
 def get_stock_availability(item_code, warehouse):
-	actual_qty = (
-		frappe.db.get_value(
-			"Stock Ledger Entry",
-			filters={
-				"item_code": item_code,
-				"warehouse": warehouse,
-				"is_cancelled": 0,
-			},
-			fieldname="qty_after_transaction",
-			order_by="posting_date desc, posting_time desc, creation desc",
-		)
-		or 0.0
-	)
-	return actual_qty
+	return get_stock_qty_map([item_code], warehouse).get(item_code, 0.0)
 
 
 @frappe.whitelist()
@@ -1253,14 +1303,11 @@ def create_customer(
 
 @frappe.whitelist()
 def get_items_from_barcode(selling_price_list: str, currency: str, barcode: str):
-	search_item = frappe.get_all(
-		"Item Barcode",
-		filters={"barcode": barcode},
-		fields=["parent", "barcode", "posa_uom"],
-	)
-	if len(search_item) == 0:
+	data = lookup_code(barcode, search_serial_no=False)
+	if data.get("kind") != "barcode":
 		return ""
-	item_code = search_item[0].parent
+	item_code = data.item_code
+	search_item = [frappe._dict({"parent": item_code, "barcode": barcode, "posa_uom": data.uom})]
 	item_list = frappe.get_all(
 		"Item",
 		filters={"name": item_code},
@@ -1281,31 +1328,9 @@ def get_items_from_barcode(selling_price_list: str, currency: str, barcode: str)
 
 	if item_list[0]:
 		item = item_list[0]
-		filters = {"price_list": selling_price_list, "item_code": item_code}
-		prices_with_uom = frappe.db.count(
-			"Item Price",
-			filters={
-				"price_list": selling_price_list,
-				"item_code": item_code,
-				"uom": item.stock_uom,
-			},
-		)
-
-		if prices_with_uom > 0:
-			filters["uom"] = item.stock_uom
-		else:
-			filters["uom"] = ["in", ["", None, item.stock_uom]]
-
-		item_prices_data = frappe.get_all(
-			"Item Price",
-			fields=["item_code", "price_list_rate", "currency"],
-			filters=filters,
-		)
-
-		item_price = 0
-		if len(item_prices_data):
-			item_price = item_prices_data[0].get("price_list_rate")
-			currency = item_prices_data[0].get("currency")
+		item_prices = resolve_prices([item_code], selling_price_list, currency).get(item_code) or {}
+		item_price_data = item_prices.get(item.stock_uom) or item_prices.get("None") or {}
+		item_price = item_price_data.get("price_list_rate") or 0
 
 		item.update(
 			{
@@ -1548,35 +1573,46 @@ def get_app_branch(app):
 
 
 @frappe.whitelist()
-def get_offers(profile: str) -> list:
+def get_offers(profile: str, version: str | None = None) -> list | dict:
 	pos_profile = frappe.get_doc("POS Profile", profile)
 	company = pos_profile.company
 	warehouse = pos_profile.warehouse
 	date = nowdate()
 
-	values = {
-		"company": company,
-		"pos_profile": profile,
-		"warehouse": warehouse,
-		"valid_from": date,
-		"valid_upto": date,
-	}
-	data = frappe.db.sql(
-		"""
-        SELECT *
-        FROM `tabPOS Offer`
-        WHERE
-        disable = 0 AND
-        company = %(company)s AND
-        (pos_profile is NULL OR pos_profile  = '' OR  pos_profile = %(pos_profile)s) AND
-        (warehouse is NULL OR warehouse  = '' OR  warehouse = %(warehouse)s) AND
-        (valid_from is NULL OR valid_from  = '' OR  valid_from <= %(valid_from)s) AND
-        (valid_upto is NULL OR valid_from  = '' OR  valid_upto >= %(valid_upto)s)
-    """,
-		values=values,
-		as_dict=1,
-	)
-	return data
+	def _get_offers():
+		values = {
+			"company": company,
+			"pos_profile": profile,
+			"warehouse": warehouse,
+			"valid_from": date,
+			"valid_upto": date,
+		}
+		data = frappe.db.sql(
+			"""
+            SELECT *
+            FROM `tabPOS Offer`
+            WHERE
+            disable = 0 AND
+            company = %(company)s AND
+            (pos_profile is NULL OR pos_profile  = '' OR  pos_profile = %(pos_profile)s) AND
+            (warehouse is NULL OR warehouse  = '' OR  warehouse = %(warehouse)s) AND
+            (valid_from is NULL OR valid_from  = '' OR  valid_from <= %(valid_from)s) AND
+            (valid_upto is NULL OR valid_from  = '' OR  valid_upto >= %(valid_upto)s)
+        """,
+			values=values,
+			as_dict=1,
+		)
+		return data
+
+	def _get_cached_offers():
+		if pos_profile.posa_use_server_cache:
+			ttl = cint(pos_profile.posa_server_cache_duration) * 60
+			fingerprint = get_profile_fingerprint("offers", pos_profile, date)
+			return get_cached("offers", fingerprint, _get_offers, ttl or 1800)
+		else:
+			return _get_offers()
+
+	return versioned(["offers"], version, _get_cached_offers, profile, date)
 
 
 @frappe.whitelist()
@@ -1628,84 +1664,10 @@ def make_address(address_data: str):
 	return address
 
 
-def build_item_cache(item_code):
-	parent_item_code = item_code
-
-	attributes = [
-		a.attribute
-		for a in frappe.db.get_all(
-			"Item Variant Attribute",
-			{"parent": parent_item_code},
-			["attribute"],
-			order_by="idx asc",
-		)
-	]
-
-	item_variants_data = frappe.db.get_all(
-		"Item Variant Attribute",
-		{"variant_of": parent_item_code},
-		["parent", "attribute", "attribute_value"],
-		order_by="name",
-		as_list=1,
-	)
-
-	disabled_items = set([i.name for i in frappe.db.get_all("Item", {"disabled": 1})])
-
-	attribute_value_item_map = frappe._dict({})
-	item_attribute_value_map = frappe._dict({})
-
-	item_variants_data = [r for r in item_variants_data if r[0] not in disabled_items]
-	for row in item_variants_data:
-		item_code, attribute, attribute_value = row
-		# (attr, value) => [item1, item2]
-		attribute_value_item_map.setdefault((attribute, attribute_value), []).append(item_code)
-		# item => {attr1: value1, attr2: value2}
-		item_attribute_value_map.setdefault(item_code, {})[attribute] = attribute_value
-
-	optional_attributes = set()
-	for _item_code, attr_dict in item_attribute_value_map.items():
-		for attribute in attributes:
-			if attribute not in attr_dict:
-				optional_attributes.add(attribute)
-
-	frappe.cache().hset("attribute_value_item_map", parent_item_code, attribute_value_item_map)
-	frappe.cache().hset("item_attribute_value_map", parent_item_code, item_attribute_value_map)
-	frappe.cache().hset("item_variants_data", parent_item_code, item_variants_data)
-	frappe.cache().hset("optional_attributes", parent_item_code, optional_attributes)
-
-
-def get_item_optional_attributes(item_code):
-	val = frappe.cache().hget("optional_attributes", item_code)
-
-	if not val:
-		build_item_cache(item_code)
-
-	return frappe.cache().hget("optional_attributes", item_code)
-
-
 @frappe.whitelist()
 def get_item_attributes(item_code: str) -> list:
-	attributes = frappe.db.get_all(
-		"Item Variant Attribute",
-		fields=["attribute"],
-		filters={"parenttype": "Item", "parent": item_code},
-		order_by="idx asc",
-	)
-
-	optional_attributes = get_item_optional_attributes(item_code)
-
-	for a in attributes:
-		values = frappe.db.get_all(
-			"Item Attribute Value",
-			fields=["attribute_value", "abbr"],
-			filters={"parenttype": "Item Attribute", "parent": a.attribute},
-			order_by="idx asc",
-		)
-		a.values = values
-		if a.attribute in optional_attributes:
-			a.optional = True
-
-	return attributes
+	matrix = get_variant_matrix(item_code)
+	return matrix["attributes"] if matrix else []
 
 
 @frappe.whitelist()
@@ -1927,39 +1889,7 @@ def get_active_gift_coupons(customer: str, company: str) -> list:
 
 @frappe.whitelist()
 def get_customer_info(customer: str) -> dict:
-	customer = frappe.get_doc("Customer", customer)
-
-	res = {"loyalty_points": None, "conversion_factor": None}
-
-	res["email_id"] = customer.email_id
-	res["mobile_no"] = customer.mobile_no
-	res["image"] = customer.image
-	res["loyalty_program"] = customer.loyalty_program
-	res["customer_price_list"] = customer.default_price_list
-	res["customer_group"] = customer.customer_group
-	res["customer_type"] = customer.customer_type
-	res["territory"] = customer.territory
-	res["birthday"] = customer.posa_birthday
-	res["gender"] = customer.gender
-	res["tax_id"] = customer.tax_id
-	res["posa_discount"] = customer.posa_discount
-	res["name"] = customer.name
-	res["customer_name"] = customer.customer_name
-	res["customer_group_price_list"] = frappe.get_value(
-		"Customer Group", customer.customer_group, "default_price_list"
-	)
-
-	if customer.loyalty_program:
-		lp_details = get_loyalty_program_details_with_points(
-			customer.name,
-			customer.loyalty_program,
-			silent=True,
-			include_expired_entry=False,
-		)
-		res["loyalty_points"] = lp_details.get("loyalty_points")
-		res["conversion_factor"] = lp_details.get("conversion_factor")
-
-	return res
+	return get_customer_profile(customer)
 
 
 def get_company_domain(company):
@@ -2010,30 +1940,15 @@ def auto_create_items():
 
 
 @frappe.whitelist()
-def search_serial_or_batch_or_barcode_number(search_value: str, search_serial_no: str) -> dict:
-	# search barcode no
-	barcode_data = frappe.db.get_value(
-		"Item Barcode",
-		{"barcode": search_value},
-		["barcode", "parent as item_code"],
-		as_dict=True,
-	)
-	if barcode_data:
-		return barcode_data
-	# search serial no
-	if search_serial_no:
-		serial_no_data = frappe.db.get_value(
-			"Serial No", search_value, ["name as serial_no", "item_code"], as_dict=True
-		)
-		if serial_no_data:
-			return serial_no_data
-	# search batch no
-	batch_no_data = frappe.db.get_value(
-		"Batch", search_value, ["name as batch_no", "item as item_code"], as_dict=True
+def search_serial_or_batch_or_barcode_number(
+	search_value: str, search_serial_no: str, scale_barcode_start: str | None = None
+) -> dict:
+	data = lookup_code(
+		search_value, search_serial_no=search_serial_no, scale_barcode_start=scale_barcode_start
 	)
-	if batch_no_data:
-		return batch_no_data
-	return {}
+	if not data:
+		return {}
+	return {data.kind: data.get(data.kind), "item_code": data.item_code}
 
 
 def get_seearch_items_conditions(item_code, serial_no, batch_no, barcode):
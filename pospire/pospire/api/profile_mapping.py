@@ -0,0 +1,118 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Cached POS Profile -> Sales Invoice field mapping.
+
+Accounting dimensions and the custom fields shared by POS Profile and Sales
+Invoice are copied onto every POS invoice. Which fields those are, and the
+profile's values for them, only change when the profile, a Custom Field or an
+Accounting Dimension changes, so the resolved `{fieldname: value}` plan is
+kept per profile in Redis and `update_invoice` only applies it.
+"""
+
+import frappe
+from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import get_accounting_dimensions
+
+PLAN_KEY = "pospire_profile_field_plan"
+STANDARD_DIMENSIONS = ["cost_center", "project"]
+
+# Layout/non-data fieldtypes (these don't have values to copy)
+EXCLUDED_FIELDTYPES = {"Section Break", "Column Break", "Tab Break", "HTML", "Button", "Table"}
+
+# Set by ERPNext's set_pos_fields() via set_missing_values(), or system fields
+EXCLUDED_FIELDS = {
+	"currency",
+	"letter_head",
+	"tc_name",
+	"company",
+	"select_print_heading",
+	"write_off_account",
+	"taxes_and_charges",
+	"write_off_cost_center",
+	"apply_discount_on",
+	"cost_center",
+	"tax_category",
+	"ignore_pricing_rule",
+	"company_address",
+	"account_for_change_amount",
+	"name",
+	"owner",
+	"creation",
+	"modified",
+	"modified_by",
+	"docstatus",
+	"customer",
+	"is_pos",
+	"pos_profile",
+}
+
+
+def get_profile_field_values(pos_profile):
+	"""Return `{fieldname: value}` of the non-empty POS Profile values to copy onto an invoice."""
+	plan = frappe.cache().hget(PLAN_KEY, pos_profile)
+	if plan is None:
+		try:
+			plan = build_profile_field_values(pos_profile)
+		except Exception:
+			# Left uncached, so the next invoice tries again instead of reusing a partial plan
+			frappe.log_error(title="POS Profile Field Mapping Error")
+			return {}
+		frappe.cache().hset(PLAN_KEY, pos_profile, plan)
+	return plan
+
+
+def build_profile_field_values(pos_profile):
+	dimension_fields = get_dimension_fields()
+	fields_to_copy = set(dimension_fields) | get_common_fields(dimension_fields)
+
+	sales_invoice_meta = frappe.get_meta("Sales Invoice")
+	fields_to_copy = [f for f in fields_to_copy if sales_invoice_meta.has_field(f)]
+	if not fields_to_copy:
+		return {}
+
+	values = frappe.db.get_value("POS Profile", pos_profile, fields_to_copy, as_dict=1)
+	return {
+		fieldname: value for fieldname, value in (values or {}).items() if value is not None and value != ""
+	}
+
+
+def get_dimension_fields():
+	"""Return enabled accounting dimension fieldnames plus the standard dimensions."""
+	dimensions = get_accounting_dimensions(as_list=False, filters={"disabled": 0})
+	return [d.fieldname for d in dimensions] + STANDARD_DIMENSIONS
+
+
+def get_common_fields(dimension_fields):
+	"""Return editable data fields shared by POS Profile and Sales Invoice, other than dimensions."""
+	pos_profile_fields = get_data_fields("POS Profile")
+	sales_invoice_fields = get_data_fields("Sales Invoice")
+	return (pos_profile_fields & sales_invoice_fields) - EXCLUDED_FIELDS - set(dimension_fields)
+
+
+def get_data_fields(doctype):
+	return {
+		f.fieldname
+		for f in frappe.get_meta(doctype).fields
+		if f.fieldtype not in EXCLUDED_FIELDTYPES and not f.read_only
+	}
+
+
+def clear_profile_field_values(pos_profile=None):
+	if pos_profile:
+		frappe.cache().hdel(PLAN_KEY, pos_profile)
+	else:
+		frappe.cache().delete_value(PLAN_KEY)
+
+
+def on_pos_profile_change(doc, method, *args):
+	frappe.db.after_commit.add(lambda: clear_profile_field_values(doc.name))
+
+
+def on_field_change(doc, method, *args):
+	"""Custom Field, Property Setter or Accounting Dimension changes can alter every plan."""
+	if doc.doctype != "Accounting Dimension" and (doc.get("dt") or doc.get("doc_type")) not in (
+		"POS Profile",
+		"Sales Invoice",
+	):
+		return
+	frappe.db.after_commit.add(clear_profile_field_values)
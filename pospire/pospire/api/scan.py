@@ -0,0 +1,249 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Redis lookup table for everything a cashier can scan.
+
+Barcodes, serial numbers and batch numbers live in one Redis hash whose
+fields are prefixed by kind, so resolving a scanned code (and its scale
+barcode prefix) is a single HMGET. The table is built in chunks by a
+background job on first use, lookups falling back to the tables meanwhile,
+and kept current from Item, Serial No and Batch doc events, which also update
+the table being built. Codes found nowhere are remembered for `MISS_TTL`
+seconds, or until a doc event adds them, so repeated unknown scans and search
+keystrokes do not query the tables each time.
+"""
+
+import json
+
+import frappe
+from frappe.utils.background_jobs import enqueue
+
+INDEX_KEY = "pospire_scan_index|codes"
+ITEM_BARCODES_KEY = "pospire_scan_index|item_barcodes"
+BUILT_KEY = "pospire_scan_index|built"
+BUILDING_KEY = "pospire_scan_index|building"
+MISS_KEY = "pospire_scan_index|miss"
+MISS_TTL = 30
+BUILD_CHUNK = 5000
+
+# Lookup order when the same code exists as more than one kind
+KINDS = {"barcode": "B", "serial_no": "S", "batch_no": "T"}
+SCALE_BARCODE_LENGTH = 7
+
+
+def make_key(name):
+	return frappe.cache().make_key(name)
+
+
+def get_field(kind, code):
+	return f"{KINDS[kind]}|{code}"
+
+
+def get_miss_key(field):
+	return make_key(f"{MISS_KEY}|{field}")
+
+
+def lookup_code(code, search_serial_no=True, scale_barcode_start=None):
+	"""Return `{kind, item_code, uom, <kind>}` for `code`, or an empty dict."""
+	if not code:
+		return {}
+
+	ensure_scan_index()
+	candidates = [("barcode", code)]
+	if search_serial_no:
+		candidates.append(("serial_no", code))
+	candidates.append(("batch_no", code))
+	if scale_barcode_start and code.startswith(scale_barcode_start):
+		candidates.append(("barcode", code[:SCALE_BARCODE_LENGTH]))
+
+	fields = [get_field(kind, c) for kind, c in candidates]
+	pipeline = frappe.cache().pipeline()
+	pipeline.hmget(make_key(INDEX_KEY), fields)
+	pipeline.mget([get_miss_key(field) for field in fields])
+	values, misses = pipeline.execute()
+	for (kind, matched_code), value in zip(candidates, values, strict=True):
+		if value:
+			entry = json.loads(value)
+			return frappe._dict({"kind": kind, kind: matched_code, **entry})
+
+	# Serial Nos created through Serial and Batch Bundles are bulk inserted without
+	# doc events, so fall back to the tables before reporting a miss
+	for (kind, matched_code), field, missed in zip(candidates, fields, misses, strict=True):
+		if missed:
+			continue
+		_field, value = get_db_entry(kind, matched_code)
+		if value:
+			set_code(field, value)
+			return frappe._dict({"kind": kind, kind: matched_code, **json.loads(value)})
+		pipeline.set(get_miss_key(field), 1, ex=MISS_TTL)
+	pipeline.execute()
+	return {}
+
+
+def get_db_entry(kind, code):
+	if kind == "barcode":
+		row = frappe.db.get_value(
+			"Item Barcode", {"barcode": code}, ["parent", "barcode", "posa_uom"], as_dict=1
+		)
+		return get_barcode_entry(row) if row else (None, None)
+	if kind == "serial_no":
+		row = frappe.db.get_value("Serial No", code, ["name", "item_code"], as_dict=1)
+		return get_serial_no_entry(row) if row else (None, None)
+	row = frappe.db.get_value("Batch", code, ["name", "item"], as_dict=1)
+	return get_batch_entry(row) if row else (None, None)
+
+
+def ensure_scan_index(now=False):
+	"""Build the index, in a background job unless `now` is set."""
+	if frappe.cache().get_value(BUILT_KEY):
+		return
+	if now:
+		build_scan_index()
+		return
+	enqueue(
+		"pospire.pospire.api.scan.build_scan_index",
+		queue="long",
+		job_id="pospire_scan_index",
+		deduplicate=True,
+	)
+
+
+def build_scan_index():
+	"""Fill a new table chunk by chunk and swap it in, so lookups never see it half built."""
+	index_key, barcodes_key = make_key(INDEX_KEY + "|building"), make_key(ITEM_BARCODES_KEY + "|building")
+	pipeline = frappe.cache().pipeline()
+	pipeline.delete(index_key, barcodes_key)
+	pipeline.execute()
+	# Doc events write to the new table from here on, so codes changed after their chunk is read are kept
+	frappe.cache().set_value(BUILDING_KEY, 1)
+
+	item_barcodes = {}
+	for rows in get_chunks("Item Barcode", ["parent", "barcode", "posa_uom"]):
+		for row in rows:
+			item_barcodes.setdefault(row.parent, []).append(row.barcode)
+			pipeline.hset(index_key, *get_barcode_entry(row))
+		pipeline.execute()
+	for item_code, barcodes in item_barcodes.items():
+		pipeline.hset(barcodes_key, item_code, json.dumps(barcodes))
+	pipeline.execute()
+
+	for rows in get_chunks("Serial No", ["item_code"]):
+		for row in rows:
+			pipeline.hset(index_key, *get_serial_no_entry(row))
+		pipeline.execute()
+
+	for rows in get_chunks("Batch", ["item"]):
+		for row in rows:
+			pipeline.hset(index_key, *get_batch_entry(row))
+		pipeline.execute()
+
+	# Set first, so doc events from now on also write to the live table
+	frappe.cache().set_value(BUILT_KEY, 1)
+	# RENAME fails on a missing key, and an empty hash is never created
+	for name in (INDEX_KEY, ITEM_BARCODES_KEY):
+		if frappe.cache().exists(name + "|building"):
+			pipeline.rename(make_key(name + "|building"), make_key(name))
+		else:
+			pipeline.delete(make_key(name))
+	pipeline.execute()
+	frappe.cache().delete_value(BUILDING_KEY)
+	# Doc events between the rename and here wrote to both tables, drop their copy
+	pipeline.delete(index_key, barcodes_key)
+	pipeline.execute()
+
+
+def get_chunks(doctype, fields, filters=None):
+	"""Yield the `doctype` rows matching `filters` in pages of `BUILD_CHUNK`, by name."""
+	last_name = ""
+	while rows := frappe.get_all(
+		doctype,
+		filters={**(filters or {}), "name": [">", last_name]},
+		fields=["name", *fields],
+		order_by="name asc",
+		limit=BUILD_CHUNK,
+	):
+		yield rows
+		last_name = rows[-1].name
+
+
+def get_barcode_entry(row):
+	return get_field("barcode", row.barcode), json.dumps({"item_code": row.parent, "uom": row.posa_uom})
+
+
+def get_serial_no_entry(row):
+	return get_field("serial_no", row.name), json.dumps({"item_code": row.item_code, "uom": None})
+
+
+def get_batch_entry(row):
+	return get_field("batch_no", row.name), json.dumps({"item_code": row.item, "uom": None})
+
+
+def get_tables():
+	"""Return the `(codes, item barcodes)` keys of the live table once built and of the one being built."""
+	tables = []
+	if frappe.cache().get_value(BUILT_KEY):
+		tables.append((make_key(INDEX_KEY), make_key(ITEM_BARCODES_KEY)))
+	if frappe.cache().get_value(BUILDING_KEY):
+		tables.append((make_key(INDEX_KEY + "|building"), make_key(ITEM_BARCODES_KEY + "|building")))
+	return tables
+
+
+def refresh_item_barcodes(item_code, old_item_code=None):
+	rows = frappe.get_all(
+		"Item Barcode", filters={"parent": item_code}, fields=["parent", "barcode", "posa_uom"]
+	)
+	pipeline = frappe.cache().pipeline()
+	for index_key, barcodes_key in get_tables():
+		for code in {item_code, old_item_code} - {None}:
+			old_barcodes = frappe.cache().hmget(barcodes_key, [code])[0]
+			for barcode in json.loads(old_barcodes or "[]"):
+				pipeline.hdel(index_key, get_field("barcode", barcode))
+			pipeline.hdel(barcodes_key, code)
+
+		for row in rows:
+			pipeline.hset(index_key, *get_barcode_entry(row))
+		if rows:
+			pipeline.hset(barcodes_key, item_code, json.dumps([d.barcode for d in rows]))
+	for row in rows:
+		pipeline.delete(get_miss_key(get_field("barcode", row.barcode)))
+	pipeline.execute()
+
+
+def set_code(field, value=None):
+	pipeline = frappe.cache().pipeline()
+	for index_key, _barcodes_key in get_tables():
+		if value:
+			pipeline.hset(index_key, field, value)
+		else:
+			pipeline.hdel(index_key, field)
+	if value:
+		pipeline.delete(get_miss_key(field))
+	pipeline.execute()
+
+
+def on_item_update(doc, method):
+	frappe.db.after_commit.add(lambda: refresh_item_barcodes(doc.name))
+
+
+def on_item_trash(doc, method):
+	frappe.db.after_commit.add(lambda: refresh_item_barcodes(doc.name))
+
+
+def on_item_rename(doc, method, old, new, merge):
+	frappe.db.after_commit.add(lambda: refresh_item_barcodes(new, old_item_code=old))
+
+
+def on_serial_no_update(doc, method):
+	frappe.db.after_commit.add(lambda: set_code(*get_serial_no_entry(doc)))
+
+
+def on_serial_no_trash(doc, method):
+	frappe.db.after_commit.add(lambda: set_code(get_field("serial_no", doc.name)))
+
+
+def on_batch_update(doc, method):
+	frappe.db.after_commit.add(lambda: set_code(*get_batch_entry(doc)))
+
+
+def on_batch_trash(doc, method):
+	frappe.db.after_commit.add(lambda: set_code(get_field("batch_no", doc.name)))
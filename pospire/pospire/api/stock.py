@@ -0,0 +1,71 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Stock availability for POS, read from the Bin projection.
+
+Quantities can optionally be kept in Redis for a short time. Cached entries
+are dropped once a Stock Ledger Entry for the same item and warehouse commits.
+"""
+
+import frappe
+from frappe.utils import flt
+
+STOCK_CACHE_TTL = 60
+
+
+def get_stock_qty_map(items, warehouse, use_cache=False):
+	"""Return `{item_code: actual_qty}` for every item in `items` at `warehouse`."""
+	items = list(set(items or []))
+	if not items or not warehouse:
+		return {}
+
+	stock_qty = {}
+	missing = items
+	if use_cache:
+		stock_qty = get_cached_stock_qty(items, warehouse)
+		missing = [d for d in items if d not in stock_qty]
+
+	if missing:
+		fetched = dict.fromkeys(missing, 0.0)
+		fetched.update(
+			frappe.db.sql(
+				"""
+				SELECT item_code, actual_qty
+				FROM `tabBin`
+				WHERE warehouse = %(warehouse)s AND item_code IN %(items)s
+				""",
+				{"warehouse": warehouse, "items": tuple(missing)},
+			)
+		)
+		if use_cache:
+			set_cached_stock_qty(fetched, warehouse)
+		stock_qty.update(fetched)
+
+	return {item_code: flt(qty) for item_code, qty in stock_qty.items()}
+
+
+def get_stock_cache_key(item_code, warehouse):
+	return frappe.cache().make_key(f"pospire_stock_qty|{warehouse}|{item_code}")
+
+
+def get_cached_stock_qty(items, warehouse):
+	values = frappe.cache().mget([get_stock_cache_key(d, warehouse) for d in items])
+	return {
+		item_code: flt(value) for item_code, value in zip(items, values, strict=True) if value is not None
+	}
+
+
+def set_cached_stock_qty(stock_qty, warehouse):
+	pipeline = frappe.cache().pipeline()
+	for item_code, qty in stock_qty.items():
+		pipeline.set(get_stock_cache_key(item_code, warehouse), flt(qty), ex=STOCK_CACHE_TTL)
+	pipeline.execute()
+
+
+def clear_stock_cache(item_code, warehouse):
+	frappe.cache().delete(get_stock_cache_key(item_code, warehouse))
+
+
+def on_stock_ledger_entry_submit(doc, method):
+	# Bin is updated later in the same transaction, so only drop the entry once it commits
+	frappe.db.after_commit.add(lambda: clear_stock_cache(doc.item_code, doc.warehouse))
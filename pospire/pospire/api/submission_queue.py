@@ -0,0 +1,226 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Background submission queue for POS invoices.
+
+With `posa_allow_submissions_in_background_job` set on the POS Profile, a
+checkout saves the invoice as a printed draft and queues it here: one POS
+Invoice Submission per invoice, holding what the submit needs to redeem
+customer credit. A single job per opening shift drains the queue, submitting
+each invoice in its own transaction. Failures are retried with exponential
+backoff by the job or the scheduler, and marked Failed after `MAX_ATTEMPTS`;
+a failed invoice is only queued again once it has been edited.
+"""
+
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import add_to_date, now_datetime
+from frappe.utils.background_jobs import enqueue
+
+from pospire.pospire.api import posapp
+
+DOCTYPE = "POS Invoice Submission"
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 30
+# Seconds a never-attempted entry may wait before the scheduler restarts its worker
+STALE_AFTER = 60
+
+
+def get_job_id(pos_opening_shift):
+	return f"pospire_submission|{pos_opening_shift}"
+
+
+def get_retry_delay(attempts):
+	"""Seconds to wait before retrying after `attempts` failures: 30, 60, 120, ..."""
+	return RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def queue_invoice(invoice, pos_opening_shift, payload=None):
+	"""Queue `invoice` for submission, replacing an earlier entry, and start the shift's worker."""
+	values = {"status": "Queued", "attempts": 0, "next_attempt_at": None, "error": None}
+	if payload is not None:
+		values["payload"] = frappe.as_json(payload)
+
+	if frappe.db.exists(DOCTYPE, invoice):
+		frappe.db.set_value(DOCTYPE, invoice, values)
+	else:
+		frappe.get_doc(
+			{"doctype": DOCTYPE, "sales_invoice": invoice, "pos_opening_shift": pos_opening_shift, **values}
+		).insert(ignore_permissions=True)
+	enqueue_worker(pos_opening_shift)
+
+
+def queue_printed_invoices(pos_opening_shift):
+	"""Queue printed drafts of the shift not queued yet, and failed ones edited since they failed."""
+	entries = {
+		d.sales_invoice: d
+		for d in frappe.get_all(
+			DOCTYPE,
+			filters={"pos_opening_shift": pos_opening_shift},
+			fields=["sales_invoice", "status", "modified"],
+		)
+	}
+	for invoice in frappe.get_all(
+		"Sales Invoice",
+		filters={"posa_pos_opening_shift": pos_opening_shift, "docstatus": 0, "posa_is_printed": 1},
+		fields=["name", "modified"],
+	):
+		entry = entries.get(invoice.name)
+		if not entry or (entry.status == "Failed" and invoice.modified > entry.modified):
+			queue_invoice(invoice.name, pos_opening_shift)
+
+
+def enqueue_worker(pos_opening_shift):
+	"""Start the shift's worker once the transaction commits, however many entries it queued."""
+	pending = frappe.flags.setdefault("pospire_submission_workers", set())
+	if pos_opening_shift in pending:
+		return
+	pending.add(pos_opening_shift)
+	frappe.db.after_commit.add(lambda: start_worker(pos_opening_shift))
+	frappe.db.after_rollback.add(lambda: pending.discard(pos_opening_shift))
+
+
+def start_worker(pos_opening_shift):
+	frappe.flags.pospire_submission_workers.discard(pos_opening_shift)
+	# A worker already queued or running for the shift picks the new entry up
+	enqueue(
+		"pospire.pospire.api.submission_queue.process_queue",
+		queue="long",
+		job_id=get_job_id(pos_opening_shift),
+		deduplicate=True,
+		pos_opening_shift=pos_opening_shift,
+	)
+
+
+def get_due_entries(pos_opening_shift):
+	entry = frappe.qb.DocType(DOCTYPE)
+	return (
+		frappe.qb.from_(entry)
+		.select(entry.name)
+		.where(
+			(entry.pos_opening_shift == pos_opening_shift)
+			& (entry.status == "Queued")
+			& (entry.next_attempt_at.isnull() | (entry.next_attempt_at <= now_datetime()))
+		)
+		.orderby(entry.creation)
+		.run(pluck=True)
+	)
+
+
+def process_queue(pos_opening_shift):
+	"""Submit the due invoices of a shift, until none are left."""
+	while entries := get_due_entries(pos_opening_shift):
+		for name in entries:
+			submit_entry(name)
+
+
+def submit_entry(name):
+	entry = frappe.get_doc(DOCTYPE, name)
+	try:
+		invoice_doc = frappe.get_doc("Sales Invoice", entry.sales_invoice)
+		if invoice_doc.docstatus == 0:
+			payload = frappe._dict(json.loads(entry.payload or "{}"))
+			frappe.flags.ignore_account_permission = True
+			invoice_doc.flags.ignore_permissions = True
+			invoice_doc.submit()
+			posapp.redeeming_customer_credit(
+				invoice_doc,
+				payload.data or {},
+				payload.is_payment_entry,
+				payload.total_cash,
+				payload.cash_account,
+				invoice_doc.payments,
+			)
+		entry.db_set({"status": "Submitted", "error": None})
+		frappe.db.commit()
+	except Exception as e:
+		frappe.db.rollback()
+		attempts = entry.attempts + 1
+		values = {"attempts": attempts, "error": str(e) or type(e).__name__}
+		if attempts >= MAX_ATTEMPTS:
+			values["status"] = "Failed"
+			frappe.log_error(title=f"POS invoice submission failed for {entry.sales_invoice}")
+		else:
+			values["next_attempt_at"] = add_to_date(now_datetime(), seconds=get_retry_delay(attempts))
+		frappe.db.set_value(DOCTYPE, name, values)
+		frappe.db.commit()
+
+
+def process_due_entries():
+	"""Scheduled: start workers for shifts with entries due for a retry, or left behind.
+
+	An entry queued while the shift's worker was finishing is dropped by the job
+	deduplication, so entries waiting for their first attempt for over a minute
+	are picked up as well.
+	"""
+	entry = frappe.qb.DocType(DOCTYPE)
+	now = now_datetime()
+	for pos_opening_shift in (
+		frappe.qb.from_(entry)
+		.select(entry.pos_opening_shift)
+		.distinct()
+		.where(
+			(entry.status == "Queued")
+			& (
+				(entry.next_attempt_at <= now)
+				| (
+					entry.next_attempt_at.isnull()
+					& (entry.modified <= add_to_date(now, seconds=-STALE_AFTER))
+				)
+			)
+		)
+		.run(pluck=True)
+	):
+		enqueue_worker(pos_opening_shift)
+
+
+@frappe.whitelist()
+def get_submission_status(pos_opening_shift: str) -> dict:
+	"""Return the number of queued, submitted and failed invoices of a shift, and the failed ones."""
+	counts = dict(
+		frappe.get_all(
+			DOCTYPE,
+			filters={"pos_opening_shift": pos_opening_shift},
+			fields=["status", "count(name)"],
+			group_by="status",
+			as_list=True,
+		)
+	)
+	return {
+		"queued": counts.get("Queued", 0),
+		"submitted": counts.get("Submitted", 0),
+		"failed": counts.get("Failed", 0),
+		"failed_invoices": frappe.get_all(
+			DOCTYPE,
+			filters={"pos_opening_shift": pos_opening_shift, "status": "Failed"},
+			fields=["sales_invoice", "attempts", "error"],
+		),
+	}
+
+
+def validate_submissions_done(pos_opening_shift):
+	status = get_submission_status(pos_opening_shift)
+	if status["queued"]:
+		frappe.throw(
+			_("{0} invoices of this shift are still being submitted. Please try again shortly.").format(
+				status["queued"]
+			),
+			title=_("Submissions Pending"),
+		)
+
+	# Invoices submitted, cancelled or deleted by hand since they failed no longer hold the shift
+	failed = [
+		d.sales_invoice
+		for d in status["failed_invoices"]
+		if frappe.db.get_value("Sales Invoice", d.sales_invoice, "docstatus") == 0
+	]
+	if failed:
+		frappe.throw(
+			_(
+				"These invoices could not be submitted: {0}. Correct them to retry the submission, "
+				"or submit or delete them before closing the shift."
+			).format(", ".join(failed)),
+			title=_("Submissions Failed"),
+		)
@@ -0,0 +1,196 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Variant matrix cache for template items.
+
+Each template has one entry in a Redis hash holding its attributes with their
+values and optional flags, and every enabled variant's attribute values, so
+the variant selector needs a single read per template. Missing entries are
+built in bulk; existing ones are patched from Item and Item Attribute doc
+events rather than rebuilt.
+"""
+
+import pickle
+
+import frappe
+
+MATRIX_KEY = "pospire_variant_matrix"
+
+
+def get_variant_matrices(templates):
+	"""Return `{template: {attributes, variants}}` for `templates`."""
+	templates = list(set(templates or []))
+	if not templates:
+		return {}
+
+	key = frappe.cache().make_key(MATRIX_KEY)
+	matrices = {}
+	for template, value in zip(templates, frappe.cache().hmget(key, templates), strict=True):
+		if value is not None:
+			matrices[template] = pickle.loads(value)
+
+	missing = [d for d in templates if d not in matrices]
+	if missing:
+		built = build_variant_matrices(missing)
+		for template, matrix in built.items():
+			frappe.cache().hset(MATRIX_KEY, template, matrix)
+		matrices.update(built)
+	return matrices
+
+
+def get_variant_matrix(template):
+	return get_variant_matrices([template]).get(template)
+
+
+def build_variant_matrices(templates):
+	matrices = {template: new_matrix() for template in templates}
+
+	for row in frappe.get_all(
+		"Item Variant Attribute",
+		fields=["parent", "attribute"],
+		filters={"parenttype": "Item", "parent": ["in", templates]},
+		order_by="idx asc",
+	):
+		matrices[row.parent]["attributes"].append(frappe._dict({"attribute": row.attribute, "values": []}))
+
+	attribute_values = get_attribute_values(
+		{a.attribute for matrix in matrices.values() for a in matrix["attributes"]}
+	)
+	for matrix in matrices.values():
+		for a in matrix["attributes"]:
+			a.values = attribute_values.get(a.attribute, [])
+
+	for row in frappe.db.sql(
+		"""
+		SELECT attr.variant_of, attr.parent, attr.attribute, attr.attribute_value
+		FROM `tabItem Variant Attribute` attr
+		INNER JOIN `tabItem` item ON item.name = attr.parent
+		WHERE attr.variant_of IN %(templates)s AND item.disabled = 0
+		ORDER BY attr.name
+		""",
+		{"templates": tuple(templates)},
+		as_dict=1,
+	):
+		matrices[row.variant_of]["variants"].setdefault(row.parent, {})[row.attribute] = row.attribute_value
+
+	for matrix in matrices.values():
+		update_optional_flags(matrix)
+	return matrices
+
+
+def new_matrix():
+	return {"attributes": [], "variants": {}}
+
+
+def get_attribute_values(attributes):
+	"""Return `{attribute: [{attribute_value, abbr}]}`."""
+	attribute_values = {}
+	if not attributes:
+		return attribute_values
+
+	for row in frappe.get_all(
+		"Item Attribute Value",
+		fields=["parent", "attribute_value", "abbr"],
+		filters={"parenttype": "Item Attribute", "parent": ["in", list(attributes)]},
+		order_by="idx asc",
+	):
+		attribute_values.setdefault(row.pop("parent"), []).append(row)
+	return attribute_values
+
+
+def update_optional_flags(matrix):
+	"""Flag the attributes some variants of `matrix["variants"]` do without."""
+	for a in matrix["attributes"]:
+		a.pop("optional", None)
+		if any(a.attribute not in values for values in matrix["variants"].values()):
+			a.optional = True
+
+
+def get_template_attributes(templates):
+	"""Return `{template: [{attribute, values, optional}]}`."""
+	return {
+		template: matrix["attributes"]
+		for template, matrix in get_variant_matrices(templates).items()
+		if matrix["attributes"]
+	}
+
+
+def update_variant(template, variant, values=None):
+	"""Replace `variant`'s attribute values in a cached matrix; `None` removes it."""
+	matrix = frappe.cache().hget(MATRIX_KEY, template)
+	if matrix is None:
+		return
+
+	matrix["variants"].pop(variant, None)
+	if values:
+		matrix["variants"][variant] = values
+	update_optional_flags(matrix)
+	frappe.cache().hset(MATRIX_KEY, template, matrix)
+
+
+def update_attribute_values(attribute):
+	"""Reload the values of `attribute` into every cached template using it."""
+	values = get_attribute_values([attribute]).get(attribute, [])
+	for template in get_attribute_templates(attribute):
+		matrix = frappe.cache().hget(MATRIX_KEY, template)
+		if matrix is None:
+			continue
+		for a in matrix["attributes"]:
+			if a.attribute == attribute:
+				a.values = values
+		frappe.cache().hset(MATRIX_KEY, template, matrix)
+
+
+def get_attribute_templates(attribute):
+	return frappe.get_all(
+		"Item Variant Attribute",
+		filters={"parenttype": "Item", "attribute": attribute, "variant_of": ["is", "not set"]},
+		pluck="parent",
+		distinct=True,
+	)
+
+
+def clear_variant_matrix(*templates):
+	for template in templates:
+		if template:
+			frappe.cache().hdel(MATRIX_KEY, template)
+
+
+def on_item_update(doc, method):
+	old_doc = doc.get_doc_before_save()
+	old_template = old_doc.variant_of if old_doc else None
+
+	def update():
+		if doc.has_variants:
+			clear_variant_matrix(doc.name)
+		if old_template and old_template != doc.variant_of:
+			update_variant(old_template, doc.name)
+		if doc.variant_of:
+			values = None
+			if not doc.disabled:
+				values = {d.attribute: d.attribute_value for d in doc.attributes}
+			update_variant(doc.variant_of, doc.name, values)
+
+	frappe.db.after_commit.add(update)
+
+
+def on_item_trash(doc, method):
+	def remove():
+		clear_variant_matrix(doc.name)
+		if doc.variant_of:
+			update_variant(doc.variant_of, doc.name)
+
+	frappe.db.after_commit.add(remove)
+
+
+def on_item_rename(doc, method, old, new, merge):
+	frappe.db.after_commit.add(lambda: clear_variant_matrix(old, new, doc.variant_of))
+
+
+def on_item_attribute_update(doc, method):
+	frappe.db.after_commit.add(lambda: update_attribute_values(doc.name))
+
+
+def on_item_attribute_trash(doc, method):
+	templates = get_attribute_templates(doc.name)
+	frappe.db.after_commit.add(lambda: clear_variant_matrix(*templates))
@@ -0,0 +1,95 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+"""Background warmup of the POS caches for a POS Profile.
+
+Opening a shift enqueues one deduplicated job per profile using the server
+cache that builds the price, search and scan indexes and the cached catalog,
+customer and offer results, so the terminals that load next hit warm caches.
+The job records its progress in Redis for `get_warmup_status`, which the
+navbar polls to show while the caches are warming up.
+"""
+
+import frappe
+from frappe.utils import now
+from frappe.utils.background_jobs import enqueue, is_job_enqueued
+
+from pospire.pospire.api.item_price import ensure_price_index
+from pospire.pospire.api.item_search import ensure_search_index
+from pospire.pospire.api.scan import ensure_scan_index
+from pospire.pospire.api.variant import get_variant_matrices
+
+STATUS_TTL = 24 * 60 * 60
+
+
+def get_status_key(pos_profile):
+	return f"pospire_warmup|{pos_profile}"
+
+
+def set_status(pos_profile, status, **kwargs):
+	value = (frappe.cache().get_value(get_status_key(pos_profile)) or {}) | {"status": status, **kwargs}
+	frappe.cache().set_value(get_status_key(pos_profile), value, expires_in_sec=STATUS_TTL)
+
+
+@frappe.whitelist()
+def get_warmup_status(pos_profile: str) -> dict:
+	"""Return `{status, queued_at, started_at, finished_at}`; status is empty when never warmed."""
+	return frappe.cache().get_value(get_status_key(pos_profile)) or {"status": ""}
+
+
+def enqueue_warmup(pos_profile):
+	# Without the server cache there is nothing but the indexes to warm, and they build on first use
+	if not frappe.db.get_value("POS Profile", pos_profile, "posa_use_server_cache"):
+		return
+	if is_job_enqueued(get_status_key(pos_profile)):
+		return
+	set_status(pos_profile, "Queued", queued_at=now(), started_at=None, finished_at=None, error=None)
+	enqueue(
+		"pospire.pospire.api.warmup.warm_pos_profile",
+		queue="long",
+		job_id=get_status_key(pos_profile),
+		deduplicate=True,
+		enqueue_after_commit=True,
+		pos_profile=pos_profile,
+	)
+
+
+def warm_pos_profile(pos_profile):
+	# posapp imports this module to enqueue the warmup
+	from pospire.pospire.api import posapp
+
+	set_status(pos_profile, "Running", started_at=now())
+	try:
+		profile = frappe.get_doc("POS Profile", pos_profile)
+		profile_json = frappe.as_json(profile.as_dict())
+
+		ensure_price_index(profile.selling_price_list, profile.currency)
+		ensure_search_index(now=True)
+		ensure_scan_index(now=True)
+
+		if profile.posa_local_storage and not profile.pose_use_limit_search:
+			# These terminals keep the catalog and only ask for what changed, which is not cached; of
+			# what those rows read, prices are indexed above and stock expires within a minute
+			if profile.posa_show_template_items:
+				condition = posapp.get_item_group_condition(pos_profile) + " AND has_variants = 1"
+				get_variant_matrices([d.item_code for d in posapp.get_items_data(condition)])
+		else:
+			# Items are requested before and after the default customer is set on the terminal
+			for customer in {None, profile.customer}:
+				posapp.get_items(profile_json, customer=customer)
+		posapp.get_customer_names(profile_json)
+		posapp.get_offers(pos_profile)
+	except Exception as e:
+		frappe.log_error(title=f"POS cache warmup failed for {pos_profile}")
+		set_status(pos_profile, "Failed", finished_at=now(), error=str(e))
+		return
+
+	set_status(pos_profile, "Ready", finished_at=now())
+
+
+def warm_active_profiles():
+	"""Scheduled before store opening: warm every enabled POS Profile using the server cache."""
+	for pos_profile in frappe.get_all(
+		"POS Profile", filters={"disabled": 0, "posa_use_server_cache": 1}, pluck="name"
+	):
+		enqueue_warmup(pos_profile)
@@ -9,6 +9,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import flt
 
+from pospire.pospire.api.submission_queue import queue_printed_invoices, validate_submissions_done
+
 
 class POSClosingShift(Document):
 	def validate(self):
@@ -130,6 +132,7 @@ def get_payments_entries(pos_opening_shift: str) -> list:
 def make_closing_shift_from_opening(opening_shift: str):
 	opening_shift = json.loads(opening_shift)
 	submit_printed_invoices(opening_shift.get("name"))
+	validate_submissions_done(opening_shift.get("name"))
 	closing_shift = frappe.new_doc("POS Closing Shift")
 	closing_shift.pos_opening_shift = opening_shift.get("name")
 	closing_shift.period_start_date = opening_shift.get("period_start_date")
@@ -261,6 +264,14 @@ def submit_closing_shift(closing_shift: str) -> str:
 
 
 def submit_printed_invoices(pos_opening_shift):
+	pos_profile = frappe.db.get_value("POS Opening Shift", pos_opening_shift, "pos_profile")
+	if frappe.get_cached_value("POS Profile", pos_profile, "posa_allow_submissions_in_background_job"):
+		# Left to the shift's submission queue, see get_submission_status. Committed so the
+		# entries survive make_closing_shift_from_opening refusing to close while they are pending.
+		queue_printed_invoices(pos_opening_shift)
+		frappe.db.commit()  # nosemgrep: frappe-manual-commit — the entries must outlive the refusal to close
+		return
+
 	invoices_list = frappe.get_all(
 		"Sales Invoice",
 		filters={
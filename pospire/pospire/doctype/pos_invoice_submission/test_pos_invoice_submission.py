@@ -0,0 +1,98 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from pospire.pospire.api.submission_queue import (
+	enqueue_worker,
+	get_job_id,
+	get_retry_delay,
+	get_submission_status,
+	validate_submissions_done,
+)
+
+# Skip ERPNext test record bootstrapping — entries link to placeholder names
+test_ignore = ["Sales Invoice", "POS Opening Shift"]
+
+
+class TestPOSInvoiceSubmission(FrappeTestCase):
+	def make_entry(self, status, pos_opening_shift):
+		return frappe.get_doc(
+			{
+				"doctype": "POS Invoice Submission",
+				"sales_invoice": f"_Test SINV {frappe.generate_hash()[:8]}",
+				"pos_opening_shift": pos_opening_shift,
+				"status": status,
+			}
+		).insert(ignore_permissions=True, ignore_links=True)
+
+	def test_one_entry_per_invoice(self):
+		"""Entries are named by their invoice, so an invoice cannot be queued twice."""
+		entry = self.make_entry("Queued", "_Test Shift")
+		self.assertEqual(entry.name, entry.sales_invoice)
+		self.assertRaises(
+			frappe.DuplicateEntryError,
+			frappe.get_doc(
+				{
+					"doctype": "POS Invoice Submission",
+					"sales_invoice": entry.sales_invoice,
+					"pos_opening_shift": "_Test Shift",
+				}
+			).insert,
+			ignore_permissions=True,
+			ignore_links=True,
+		)
+
+	def test_retry_delay_backs_off(self):
+		"""Each failed attempt doubles the wait before the next one."""
+		self.assertEqual([get_retry_delay(n) for n in (1, 2, 3)], [30, 60, 120])
+
+	def test_worker_enqueued_once_per_transaction(self):
+		"""Queuing several invoices of a shift in one transaction enqueues its worker once, on commit."""
+		pos_opening_shift = f"_Test Shift {frappe.generate_hash()[:8]}"
+		with patch("pospire.pospire.api.submission_queue.enqueue") as enqueue:
+			enqueue_worker(pos_opening_shift)
+			enqueue_worker(pos_opening_shift)
+			enqueue.assert_not_called()
+			frappe.db.after_commit.run()
+
+		enqueue.assert_called_once()
+		self.assertEqual(enqueue.call_args.kwargs["job_id"], get_job_id(pos_opening_shift))
+		self.assertNotIn(pos_opening_shift, frappe.flags.pospire_submission_workers)
+
+	def test_worker_not_enqueued_on_rollback(self):
+		"""A rolled back transaction enqueues nothing and lets the next one start the worker."""
+		pos_opening_shift = f"_Test Shift {frappe.generate_hash()[:8]}"
+		with patch("pospire.pospire.api.submission_queue.enqueue") as enqueue:
+			enqueue_worker(pos_opening_shift)
+			frappe.db.rollback()
+			frappe.db.after_commit.run()
+
+		enqueue.assert_not_called()
+		self.assertNotIn(pos_opening_shift, frappe.flags.pospire_submission_workers)
+
+	def test_submission_status_counts(self):
+		"""Status counts entries of the shift by status and lists the failed ones."""
+		pos_opening_shift = f"_Test Shift {frappe.generate_hash()[:8]}"
+		self.make_entry("Queued", pos_opening_shift)
+		self.make_entry("Submitted", pos_opening_shift)
+		failed = self.make_entry("Failed", pos_opening_shift)
+
+		status = get_submission_status(pos_opening_shift)
+		self.assertEqual((status["queued"], status["submitted"], status["failed"]), (1, 1, 1))
+		self.assertEqual([d.sales_invoice for d in status["failed_invoices"]], [failed.sales_invoice])
+
+	def test_pending_entries_block_closing(self):
+		"""The shift cannot close while entries are queued."""
+		pos_opening_shift = f"_Test Shift {frappe.generate_hash()[:8]}"
+		self.make_entry("Queued", pos_opening_shift)
+		self.assertRaises(frappe.ValidationError, validate_submissions_done, pos_opening_shift)
+
+	def test_failed_entry_of_removed_invoice_does_not_block_closing(self):
+		"""A failed entry only holds the shift while its invoice is still a draft."""
+		pos_opening_shift = f"_Test Shift {frappe.generate_hash()[:8]}"
+		self.make_entry("Failed", pos_opening_shift)
+		validate_submissions_done(pos_opening_shift)
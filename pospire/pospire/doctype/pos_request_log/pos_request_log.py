@@ -0,0 +1,57 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.query_builder import Interval
+from frappe.query_builder.functions import Now
+
+
+class POSRequestLog(Document):
+	@staticmethod
+	def clear_old_logs(days=30):
+		table = frappe.qb.DocType("POS Request Log")
+		frappe.db.delete(table, filters=(table.modified < (Now() - Interval(days=days))))
+
+
+def run_once(request_key, method, fn, reference_doctype=None):
+	"""Return the result of `fn()`, running it only once per client supplied `request_key`.
+
+	The result is stored in the same transaction as the work, so a replay of a
+	committed request returns the stored result and a request that failed can
+	be retried. Without a key `fn` simply runs.
+	"""
+	if not request_key:
+		return fn()
+
+	log = get_log(request_key, method)
+	if log:
+		return frappe.parse_json(log.response)
+
+	try:
+		# Concurrent retries of the same request wait on the key until this transaction ends
+		log = frappe.get_doc({"doctype": "POS Request Log", "request_key": request_key, "method": method})
+		log.insert(ignore_permissions=True)
+	except frappe.DuplicateEntryError:
+		# insert() also queued a "already exists" message for the client, drop it
+		frappe.clear_last_message()
+		# A locking read sees the request committed after this transaction started
+		return frappe.parse_json(get_log(request_key, method, for_update=True).response)
+
+	result = fn()
+	response = result.as_dict() if isinstance(result, Document) else result
+	values = {"response": frappe.as_json(response)}
+	if reference_doctype:
+		values.update({"reference_doctype": reference_doctype, "reference_name": response.get("name")})
+	log.db_set(values, update_modified=False)
+	return result
+
+
+def get_log(request_key, method, for_update=False):
+	log = frappe.db.get_value(
+		"POS Request Log", request_key, ["method", "response"], as_dict=1, for_update=for_update
+	)
+	if log and log.method != method:
+		frappe.throw(_("Request key {0} was already used for {1}").format(request_key, log.method))
+	return log
@@ -0,0 +1,53 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from pospire.pospire.doctype.pos_request_log.pos_request_log import run_once
+
+# Skip test record bootstrapping — logs reference placeholder documents
+test_ignore = ["DocType"]
+
+
+class TestPOSRequestLog(FrappeTestCase):
+	def test_replay_returns_stored_result(self):
+		"""A replayed request key returns the first result without running again."""
+		request_key = frappe.generate_hash()
+		calls = []
+
+		def work():
+			calls.append(1)
+			return {"name": f"_Test Invoice {len(calls)}", "status": 1}
+
+		first = run_once(request_key, "checkout", work)
+		second = run_once(request_key, "checkout", work)
+
+		self.assertEqual(len(calls), 1)
+		self.assertEqual(first, second)
+		self.assertTrue(frappe.db.exists("POS Request Log", request_key))
+
+	def test_without_key_always_runs(self):
+		"""Requests without a key run every time and are not logged."""
+		calls = []
+		run_once(None, "checkout", lambda: calls.append(1) or {})
+		run_once(None, "checkout", lambda: calls.append(1) or {})
+		self.assertEqual(len(calls), 2)
+
+	def test_key_reused_for_other_method(self):
+		"""A key cannot be replayed against a different method."""
+		request_key = frappe.generate_hash()
+		run_once(request_key, "checkout", lambda: {"name": "_Test Invoice"})
+		self.assertRaises(
+			frappe.ValidationError, run_once, request_key, "update_invoice", lambda: {"name": "_Test Invoice"}
+		)
+
+	def test_reference_is_recorded(self):
+		"""The referenced document name is taken from the response."""
+		request_key = frappe.generate_hash()
+		run_once(
+			request_key, "checkout", lambda: {"name": "_Test Invoice"}, reference_doctype="Sales Invoice"
+		)
+		log = frappe.get_doc("POS Request Log", request_key)
+		self.assertEqual(log.reference_doctype, "Sales Invoice")
+		self.assertEqual(log.reference_name, "_Test Invoice")
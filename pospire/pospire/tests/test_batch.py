@@ -0,0 +1,60 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, flt, today
+
+from pospire.pospire.api.batch import get_batch_availability
+from pospire.pospire.tests.test_utils import (
+	can_post_ledger_entries,
+	create_test_batch,
+	create_test_stock_receipt,
+	ensure_test_company,
+	ensure_test_item,
+	get_test_warehouse,
+)
+
+# Skip ERPNext test record bootstrapping — tests create their own fixtures
+test_ignore = ["Company", "Item", "Warehouse", "Batch", "Stock Entry"]
+
+
+class TestBatchAvailability(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.company = ensure_test_company()
+		cls.warehouse = get_test_warehouse(cls.company)
+		if not cls.warehouse or not can_post_ledger_entries(cls.company):
+			cls.skipTest(cls, "Company has no warehouse, default accounts or fiscal year for stock postings")
+		cls.item = ensure_test_item("_Test POSpire Batch Item", is_stock_item=1, has_batch_no=1)
+
+	def test_only_sellable_batches_are_listed(self):
+		"""Expired batches and batches without stock in the warehouse are left out."""
+		in_stock = create_test_batch(self.item)
+		create_test_stock_receipt(self.company, self.item, self.warehouse, 3, in_stock.name)
+
+		expired = create_test_batch(self.item)
+		create_test_stock_receipt(self.company, self.item, self.warehouse, 2, expired.name)
+		# Expired after the receipt, which would refuse an expired batch
+		frappe.db.set_value("Batch", expired.name, "expiry_date", add_days(today(), -1))
+
+		# Never received, so it has no ledger entries at all
+		never_received = create_test_batch(self.item)
+
+		batches = get_batch_availability([self.item], self.warehouse).get(self.item) or []
+		batches = {d.batch_no: flt(d.batch_qty) for d in batches}
+		self.assertEqual(batches.get(in_stock.name), 3)
+		self.assertNotIn(expired.name, batches)
+		self.assertNotIn(never_received.name, batches)
+
+	def test_batch_without_stock_is_left_out(self):
+		"""A batch whose only receipt is cancelled has no quantity left and is not listed."""
+		batch = create_test_batch(self.item)
+		receipt = create_test_stock_receipt(self.company, self.item, self.warehouse, 4, batch.name)
+		receipt.cancel()
+
+		self.assertNotIn(
+			batch.name,
+			{d.batch_no for d in get_batch_availability([self.item], self.warehouse).get(self.item) or []},
+		)
@@ -0,0 +1,69 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and Contributors
+# See license.txt
+
+import json
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from pospire.pospire.api.posapp import checkout
+from pospire.pospire.tests.test_utils import (
+	can_post_ledger_entries,
+	create_test_opening_shift,
+	ensure_test_company,
+	ensure_test_customer,
+	ensure_test_item,
+	get_test_pos_profile,
+)
+
+# Skip ERPNext test record bootstrapping — tests create their own fixtures
+test_ignore = ["Company", "POS Profile", "Customer", "Item", "POS Opening Shift", "Sales Invoice"]
+
+
+class TestCheckout(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.company = ensure_test_company()
+		cls.pos_profile = get_test_pos_profile(cls.company)
+		if not cls.pos_profile:
+			cls.skipTest(cls, "No POS Profile available for testing")
+		if not can_post_ledger_entries(cls.company):
+			cls.skipTest(cls, "Company has no default accounts or fiscal year for ledger postings")
+		cls.customer = ensure_test_customer()
+		cls.item = ensure_test_item()
+
+	def setUp(self):
+		# Submitted in the request, not left to the background queue
+		frappe.db.set_value("POS Profile", self.pos_profile, "posa_allow_submissions_in_background_job", 0)
+		self.opening_shift = create_test_opening_shift(self.company, self.pos_profile)
+
+	def checkout(self, request_key=None):
+		invoice = {
+			"doctype": "Sales Invoice",
+			"company": self.company,
+			"customer": self.customer,
+			"pos_profile": self.pos_profile,
+			"posa_pos_opening_shift": self.opening_shift.name,
+			"is_pos": 0,
+			"update_stock": 0,
+			"items": [{"item_code": self.item, "qty": 1, "rate": 100}],
+		}
+		return checkout(json.dumps(invoice), json.dumps({}), request_key)
+
+	def test_checkout_submits_invoice(self):
+		"""One call builds and submits the invoice."""
+		response = self.checkout()
+		self.assertEqual(response["status"], 1)
+		self.assertEqual(frappe.db.get_value("Sales Invoice", response["name"], "docstatus"), 1)
+
+	def test_replayed_request_returns_same_invoice(self):
+		"""Sending the same request key again returns the first invoice instead of posting another."""
+		request_key = frappe.generate_hash()
+		first = self.checkout(request_key)
+		second = self.checkout(request_key)
+
+		self.assertEqual(first["name"], second["name"])
+		self.assertEqual(
+			frappe.db.count("Sales Invoice", {"posa_pos_opening_shift": self.opening_shift.name}), 1
+		)
@@ -0,0 +1,121 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt, nowdate
+
+from pospire.pospire.api.customer_credit import get_credit_ledger
+from pospire.pospire.api.posapp import complete_invoice, make_credit_redemption_entry
+from pospire.pospire.tests.test_utils import (
+	can_post_ledger_entries,
+	create_test_advance,
+	create_test_credit_note,
+	create_test_sales_invoice,
+	ensure_test_company,
+	ensure_test_customer,
+	get_cost_center,
+)
+
+# Skip ERPNext test record bootstrapping — tests create their own fixtures
+test_ignore = ["Company", "Customer", "Item", "Sales Invoice", "Payment Entry", "Journal Entry", "Account"]
+
+
+class TestCustomerCredit(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.company = ensure_test_company()
+		cls.customer = ensure_test_customer()
+		if not can_post_ledger_entries(cls.company):
+			cls.skipTest(cls, "Company has no default accounts or fiscal year for ledger postings")
+
+	def test_ledger_lists_credit_notes_before_advances(self):
+		"""Credit notes come first, each row carrying the account and amount redemption needs."""
+		advance = create_test_advance(self.company, self.customer, 40)
+		credit_note = create_test_credit_note(self.company, self.customer, 25)
+
+		rows = get_credit_ledger(self.customer, self.company, [advance.name, credit_note.name])
+		self.assertEqual(
+			[(d.type, d.credit_origin) for d in rows],
+			[("Invoice", credit_note.name), ("Advance", advance.name)],
+		)
+		self.assertEqual(flt(rows[0].total_credit), 25)
+		self.assertEqual(rows[0].account, credit_note.debit_to)
+		self.assertEqual(flt(rows[1].total_credit), 40)
+		self.assertEqual(rows[1].account, advance.paid_from)
+		self.assertEqual({d.credit_to_redeem for d in rows}, {0})
+
+	def test_ledger_filters_by_credit_origin(self):
+		"""`credit_origins` limits the rows, and an empty list returns none."""
+		advance = create_test_advance(self.company, self.customer, 15)
+		create_test_advance(self.company, self.customer, 20)
+
+		self.assertEqual(
+			[d.credit_origin for d in get_credit_ledger(self.customer, self.company, [advance.name])],
+			[advance.name],
+		)
+		self.assertEqual(get_credit_ledger(self.customer, self.company, []), [])
+
+	def test_credit_note_over_redemption_is_refused(self):
+		"""Redeeming more than a credit note has left throws before any Journal Entry is made."""
+		credit_note = create_test_credit_note(self.company, self.customer, 10)
+		invoice_doc = frappe._dict(customer=self.customer, company=self.company)
+		journal_entries = frappe.db.count("Journal Entry")
+
+		self.assertRaises(
+			frappe.ValidationError,
+			make_credit_redemption_entry,
+			invoice_doc,
+			[{"type": "Invoice", "credit_origin": credit_note.name, "credit_to_redeem": 11}],
+			None,
+			None,
+		)
+		self.assertEqual(frappe.db.count("Journal Entry"), journal_entries)
+
+	def test_advance_over_redemption_is_refused(self):
+		"""Redeeming more than an advance has left throws while completing the invoice."""
+		advance = create_test_advance(self.company, self.customer, 10)
+		invoice_doc = frappe.new_doc("Sales Invoice")
+		invoice_doc.update({"customer": self.customer, "company": self.company, "total": 50})
+		data = {
+			"redeemed_customer_credit": 11,
+			"customer_credit_dict": [
+				{"type": "Advance", "credit_origin": advance.name, "credit_to_redeem": 11}
+			],
+		}
+
+		self.assertRaises(frappe.ValidationError, complete_invoice, invoice_doc, {}, data)
+
+	def test_credit_notes_redeemed_in_one_balanced_entry(self):
+		"""Several credit notes post one Journal Entry, debiting each note's ledger account."""
+		invoice = create_test_sales_invoice(self.company, self.customer, 100)
+		first = create_test_credit_note(self.company, self.customer, 10)
+		second = create_test_credit_note(self.company, self.customer, 30)
+		journal_entries = frappe.db.count("Journal Entry")
+
+		jv = make_credit_redemption_entry(
+			invoice,
+			[
+				{"type": "Invoice", "credit_origin": first.name, "credit_to_redeem": 10},
+				{"type": "Invoice", "credit_origin": second.name, "credit_to_redeem": 15},
+			],
+			get_cost_center(self.company),
+			nowdate(),
+		)
+
+		self.assertEqual(frappe.db.count("Journal Entry"), journal_entries + 1)
+		self.assertEqual(jv.docstatus, 1)
+		self.assertEqual(flt(jv.total_debit), 25)
+		self.assertEqual(flt(jv.total_credit), 25)
+
+		debits = {d.reference_name: d for d in jv.accounts if flt(d.debit_in_account_currency)}
+		self.assertEqual(set(debits), {first.name, second.name})
+		self.assertEqual(debits[first.name].account, first.debit_to)
+		self.assertEqual(debits[second.name].account, second.debit_to)
+		credits = [d for d in jv.accounts if flt(d.credit_in_account_currency)]
+		self.assertEqual([(d.account, d.reference_name) for d in credits], [(invoice.debit_to, invoice.name)])
+
+		# The first note is used up, the second keeps what was not redeemed
+		ledger = get_credit_ledger(self.customer, self.company, [first.name, second.name])
+		self.assertEqual([(d.credit_origin, flt(d.total_credit)) for d in ledger], [(second.name, 15)])
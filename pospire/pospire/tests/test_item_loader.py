@@ -0,0 +1,91 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from pospire.pospire.api.item_loader import build_item_rows
+from pospire.pospire.api.posapp import get_items_data
+from pospire.pospire.tests.test_utils import (
+	can_post_ledger_entries,
+	create_test_batch,
+	create_test_serial_no,
+	create_test_stock_receipt,
+	ensure_test_company,
+	ensure_test_item,
+	ensure_test_item_attribute,
+	ensure_test_variant,
+	get_test_warehouse,
+)
+
+# Skip ERPNext test record bootstrapping — tests create their own fixtures
+test_ignore = ["Company", "Item", "Warehouse", "Serial No", "Batch", "Stock Entry", "Item Attribute"]
+
+
+class TestItemLoader(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.company = ensure_test_company()
+		cls.warehouse = get_test_warehouse(cls.company)
+		if not cls.warehouse or not can_post_ledger_entries(cls.company):
+			cls.skipTest(cls, "Company has no warehouse, default accounts or fiscal year for stock postings")
+
+		cls.barcode_item = ensure_test_item(
+			"_Test POSpire Barcode Item", barcodes=[{"barcode": "_TPBC0001"}, {"barcode": "_TPBC0002"}]
+		)
+		cls.serial_item = ensure_test_item("_Test POSpire Serial Item", is_stock_item=1, has_serial_no=1)
+		cls.serial_nos = {
+			create_test_serial_no(cls.company, cls.serial_item, cls.warehouse).name for _i in range(2)
+		}
+		cls.batch_item = ensure_test_item("_Test POSpire Batch Item", is_stock_item=1, has_batch_no=1)
+		cls.batch = create_test_batch(cls.batch_item)
+		create_test_stock_receipt(cls.company, cls.batch_item, cls.warehouse, 5, cls.batch.name)
+
+		attribute = ensure_test_item_attribute("_Test POSpire Size", ["Small", "Large"])
+		cls.template = ensure_test_item(
+			"_Test POSpire Template Item", has_variants=1, attributes=[{"attribute": attribute}]
+		)
+		cls.variant = ensure_test_variant(cls.template, {attribute: "Small"})
+
+		cls.items = [cls.barcode_item, cls.serial_item, cls.batch_item, cls.template, cls.variant]
+		cls.pos_profile = frappe._dict(
+			currency=frappe.get_cached_value("Company", cls.company, "default_currency"),
+			warehouse=cls.warehouse,
+			posa_show_template_items=1,
+			posa_search_serial_no=1,
+			posa_search_batch_no=1,
+		)
+
+	def get_rows(self, items):
+		condition = " AND name in ({})".format(", ".join(frappe.db.escape(d) for d in items))
+		return {d["item_code"]: d for d in build_item_rows(self.pos_profile, get_items_data(condition), None)}
+
+	def test_bulk_rows_match_per_item_rows(self):
+		"""Loading the items together gives each item the row it gets when loaded alone."""
+		rows = self.get_rows(self.items)
+		self.assertEqual(set(rows), set(self.items))
+		for item_code in self.items:
+			self.assertEqual(rows[item_code], self.get_rows([item_code])[item_code], item_code)
+
+	def test_rows_carry_only_their_items_data(self):
+		"""Barcodes, serials, batches and attributes land on their own item only."""
+		rows = self.get_rows(self.items)
+
+		self.assertEqual(
+			{d.barcode for d in rows[self.barcode_item]["item_barcode"]}, {"_TPBC0001", "_TPBC0002"}
+		)
+		self.assertEqual({d.serial_no for d in rows[self.serial_item]["serial_no_data"]}, self.serial_nos)
+		self.assertEqual([d.batch_no for d in rows[self.batch_item]["batch_no_data"]], [self.batch.name])
+		self.assertEqual([d.attribute for d in rows[self.template]["attributes"]], ["_Test POSpire Size"])
+		self.assertEqual(
+			[(d.attribute, d.attribute_value) for d in rows[self.variant]["item_attributes"]],
+			[("_Test POSpire Size", "Small")],
+		)
+
+		for item_code in set(self.items) - {self.barcode_item}:
+			self.assertEqual(rows[item_code]["item_barcode"], [], item_code)
+		for item_code in set(self.items) - {self.serial_item}:
+			self.assertEqual(rows[item_code]["serial_no_data"], [], item_code)
+		for item_code in set(self.items) - {self.batch_item}:
+			self.assertEqual(rows[item_code]["batch_no_data"], [], item_code)
@@ -0,0 +1,130 @@
+# Copyright (c) 2025, Promantia Business Solutions PVT Ltd and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, flt, today
+
+from pospire.pospire.api.item_price import clear_price_index, resolve_prices
+from pospire.pospire.tests.test_utils import (
+	create_test_item_price,
+	ensure_test_company,
+	ensure_test_customer,
+	ensure_test_item,
+	ensure_test_price_list,
+)
+
+# Skip ERPNext test record bootstrapping — tests create their own fixtures
+test_ignore = ["Company", "Customer", "Item", "Price List", "Item Price", "UOM"]
+
+
+class TestItemPrice(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.company = ensure_test_company()
+		cls.currency = frappe.get_cached_value("Company", cls.company, "default_currency")
+		cls.customer = ensure_test_customer()
+		cls.price_list = ensure_test_price_list(cls.currency)
+		cls.item = ensure_test_item("_Test POSpire Price Item")
+
+	def setUp(self):
+		# Redis outlives the rolled back test data, start every test from an unbuilt index
+		clear_price_index(self.price_list)
+
+	def get_index_rate(self, item_code, uom, customer=None):
+		prices = resolve_prices([item_code], self.price_list, self.currency, customer).get(item_code) or {}
+		return flt(prices[uom].price_list_rate) if uom in prices else None
+
+	def get_db_rate(self, item_code, uom, customer=None):
+		"""The latest price valid today for the UOM, read straight from Item Price."""
+		rates = frappe.db.sql(
+			"""
+			SELECT price_list_rate FROM `tabItem Price`
+			WHERE item_code = %(item_code)s AND price_list = %(price_list)s AND uom = %(uom)s
+				AND selling = 1 AND IFNULL(customer, '') IN ('', %(customer)s)
+				AND valid_from <= %(today)s AND IFNULL(valid_upto, '2999-12-31') >= %(today)s
+			ORDER BY valid_from DESC
+			LIMIT 1
+			""",
+			{
+				"item_code": item_code,
+				"price_list": self.price_list,
+				"uom": uom,
+				"customer": customer or "",
+				"today": today(),
+			},
+		)
+		return flt(rates[0][0]) if rates else None
+
+	def test_index_matches_db_lookup(self):
+		"""UOM, customer and validity rules resolve to the price a direct lookup finds."""
+		create_test_item_price(self.item, self.price_list, 100, uom="Nos", valid_from=add_days(today(), -10))
+		create_test_item_price(self.item, self.price_list, 900, uom="Box", valid_from=add_days(today(), -10))
+		create_test_item_price(
+			self.item,
+			self.price_list,
+			90,
+			uom="Nos",
+			customer=self.customer,
+			valid_from=add_days(today(), -1),
+		)
+		create_test_item_price(
+			self.item,
+			self.price_list,
+			50,
+			uom="Box",
+			valid_from=add_days(today(), -5),
+			valid_upto=add_days(today(), -1),
+		)
+		create_test_item_price(self.item, self.price_list, 120, uom="Nos", valid_from=add_days(today(), 1))
+
+		for uom, customer, rate in (("Nos", None, 100), ("Box", None, 900), ("Nos", self.customer, 90)):
+			self.assertEqual(self.get_index_rate(self.item, uom, customer), rate, (uom, customer))
+			self.assertEqual(self.get_db_rate(self.item, uom, customer), rate, (uom, customer))
+
+	def test_update_refreshes_index(self):
+		"""Saving an Item Price reloads its item's entry once the transaction commits."""
+		price = create_test_item_price(self.item, self.price_list, 100, uom="Nos")
+		frappe.db.after_commit.run()
+		self.assertEqual(self.get_index_rate(self.item, "Nos"), 100)
+
+		price.price_list_rate = 110
+		price.save()
+		frappe.db.after_commit.run()
+		self.assertEqual(self.get_index_rate(self.item, "Nos"), 110)
+
+	def test_moving_price_refreshes_both_items(self):
+		"""Pointing an Item Price at another item drops it from the old item's entry."""
+		other_item = ensure_test_item("_Test POSpire Price Item 2")
+		price = create_test_item_price(self.item, self.price_list, 100, uom="Nos")
+		frappe.db.after_commit.run()
+		self.assertEqual(self.get_index_rate(self.item, "Nos"), 100)
+
+		price.item_code = other_item
+		price.save()
+		frappe.db.after_commit.run()
+		self.assertIsNone(self.get_index_rate(self.item, "Nos"))
+		self.assertEqual(self.get_index_rate(other_item, "Nos"), 100)
+
+	def test_trash_refreshes_index(self):
+		"""Deleting an Item Price removes it from the index."""
+		price = create_test_item_price(self.item, self.price_list, 100, uom="Nos")
+		frappe.db.after_commit.run()
+		self.assertEqual(self.get_index_rate(self.item, "Nos"), 100)
+
+		price.delete()
+		frappe.db.after_commit.run()
+		self.assertIsNone(self.get_index_rate(self.item, "Nos"))
+
+	def test_item_rename_moves_prices(self):
+		"""Renaming an item moves its prices to the new item code in the index."""
+		old_name = ensure_test_item(f"_Test POSpire Price Item {frappe.generate_hash()[:6]}")
+		create_test_item_price(old_name, self.price_list, 100, uom="Nos")
+		frappe.db.after_commit.run()
+		self.assertEqual(self.get_index_rate(old_name, "Nos"), 100)
+
+		new_name = frappe.rename_doc("Item", old_name, f"{old_name} Renamed", force=True)
+		frappe.db.after_commit.run()
+		self.assertIsNone(self.get_index_rate(old_name, "Nos"))
+		self.assertEqual(self.get_index_rate(new_name, "Nos"), 100)
@@ -9,6 +9,8 @@ sites (with existing data) and on fresh CI sites (empty database).
 """
 
 import frappe
+from erpnext.accounts.party import get_party_account
+from erpnext.controllers.item_variant import create_variant, get_variant
 from frappe.utils import add_days, now_datetime, nowdate, today
 
 # ---------------------------------------------------------------------------
@@ -91,6 +93,105 @@ def _ensure_territory():
 	return "All Territories"
 
 
+def ensure_test_item(item_code="_Test POSpire Item", **kwargs):
+	"""Return `item_code`, creating it as a non-stock sales item if it does not exist.
+
+	`kwargs` override the Item fields on creation, e.g. `is_stock_item` or `has_batch_no`.
+	"""
+	if frappe.db.exists("Item", item_code):
+		return item_code
+
+	doc = frappe.get_doc(
+		{
+			"doctype": "Item",
+			"item_code": item_code,
+			"item_name": item_code,
+			"item_group": _ensure_item_group(),
+			"stock_uom": _ensure_uom("Nos"),
+			"is_stock_item": 0,
+			"is_sales_item": 1,
+			**kwargs,
+		}
+	)
+	doc.insert(ignore_permissions=True, ignore_if_duplicate=True)
+	return doc.name
+
+
+def ensure_test_item_attribute(attribute, values):
+	"""Return `attribute`, creating it with `values` if it does not exist."""
+	if frappe.db.exists("Item Attribute", attribute):
+		return attribute
+
+	doc = frappe.get_doc(
+		{
+			"doctype": "Item Attribute",
+			"attribute_name": attribute,
+			"item_attribute_values": [{"attribute_value": v, "abbr": v.upper()} for v in values],
+		}
+	)
+	doc.insert(ignore_permissions=True, ignore_if_duplicate=True)
+	return doc.name
+
+
+def ensure_test_variant(template, attributes):
+	"""Return the variant of `template` with `attributes` (`{attribute: value}`), creating it if missing."""
+	variant = get_variant(template, args=attributes)
+	if variant:
+		return variant
+
+	doc = create_variant(template, attributes)
+	doc.insert(ignore_permissions=True)
+	return doc.name
+
+
+def _ensure_item_group():
+	"""Return a leaf Item Group, creating one under the root if none exists."""
+	item_group = frappe.db.get_value("Item Group", {"is_group": 0}, "name")
+	if item_group:
+		return item_group
+
+	if not frappe.db.exists("Item Group", "All Item Groups"):
+		frappe.get_doc({"doctype": "Item Group", "item_group_name": "All Item Groups", "is_group": 1}).insert(
+			ignore_permissions=True, ignore_if_duplicate=True
+		)
+	frappe.get_doc(
+		{
+			"doctype": "Item Group",
+			"item_group_name": "_Test POSpire Item Group",
+			"parent_item_group": "All Item Groups",
+		}
+	).insert(ignore_permissions=True, ignore_if_duplicate=True)
+	return "_Test POSpire Item Group"
+
+
+def _ensure_uom(uom):
+	if not frappe.db.exists("UOM", uom):
+		frappe.get_doc({"doctype": "UOM", "uom_name": uom}).insert(
+			ignore_permissions=True, ignore_if_duplicate=True
+		)
+	return uom
+
+
+def can_post_ledger_entries(company):
+	"""Return whether `company` has the default accounts and fiscal year that submitting invoices needs.
+
+	Fresh CI sites skip the setup wizard, so tests posting GL entries skip themselves when this is false.
+	"""
+	defaults = frappe.db.get_value(
+		"Company",
+		company,
+		["default_receivable_account", "default_income_account", "default_cash_account", "cost_center"],
+	)
+	if not defaults or not all(defaults):
+		return False
+	return bool(
+		frappe.db.exists(
+			"Fiscal Year",
+			{"disabled": 0, "year_start_date": ["<=", today()], "year_end_date": [">=", today()]},
+		)
+	)
+
+
 def get_test_pos_profile(company):
 	"""Return the first POS Profile for the company, or None."""
 	profiles = frappe.get_all(
@@ -113,6 +214,17 @@ def get_expense_account(company):
 	return accounts[0] if accounts else None
 
 
+def get_test_warehouse(company):
+	"""Get a non-group warehouse for the company."""
+	warehouses = frappe.get_all(
+		"Warehouse",
+		filters={"company": company, "is_group": 0},
+		limit=1,
+		pluck="name",
+	)
+	return warehouses[0] if warehouses else None
+
+
 def get_cost_center(company):
 	"""Get a non-group cost center for the company."""
 	centers = frappe.get_all(
@@ -238,3 +350,154 @@ def create_test_delivery_charges(company, account, cost_center, **kwargs):
 	)
 	doc.insert(ignore_permissions=True)
 	return doc
+
+
+def create_test_sales_invoice(company, customer, rate, qty=1, item_code=None, **kwargs):
+	"""Create and submit a non-POS Sales Invoice of one item; `kwargs` set other invoice fields."""
+	doc = frappe.get_doc(
+		{
+			"doctype": "Sales Invoice",
+			"company": company,
+			"customer": customer,
+			"posting_date": nowdate(),
+			"update_stock": 0,
+			"items": [
+				{
+					"item_code": item_code or ensure_test_item(),
+					"qty": qty,
+					"rate": rate,
+					"cost_center": get_cost_center(company),
+				}
+			],
+			**kwargs,
+		}
+	)
+	doc.insert(ignore_permissions=True)
+	doc.submit()
+	return doc
+
+
+def create_test_credit_note(company, customer, amount, item_code=None):
+	"""Create and submit a return Sales Invoice of `amount`, left outstanding as customer credit."""
+	return create_test_sales_invoice(company, customer, amount, qty=-1, item_code=item_code, is_return=1)
+
+
+def create_test_advance(company, customer, amount):
+	"""Create and submit an unallocated Payment Entry of `amount` received from `customer`."""
+	doc = frappe.get_doc(
+		{
+			"doctype": "Payment Entry",
+			"payment_type": "Receive",
+			"party_type": "Customer",
+			"party": customer,
+			"company": company,
+			"posting_date": nowdate(),
+			"paid_from": get_party_account("Customer", customer, company),
+			"paid_to": frappe.get_cached_value("Company", company, "default_cash_account"),
+			"paid_amount": amount,
+			"received_amount": amount,
+			"source_exchange_rate": 1,
+			"target_exchange_rate": 1,
+		}
+	)
+	doc.insert(ignore_permissions=True)
+	doc.submit()
+	return doc
+
+
+def create_test_serial_no(company, item_code, warehouse):
+	"""Create an active Serial No of `item_code` held in `warehouse`."""
+	doc = frappe.get_doc(
+		{
+			"doctype": "Serial No",
+			"serial_no": f"_TPS{frappe.generate_hash()[:8].upper()}",
+			"item_code": item_code,
+			"company": company,
+			"warehouse": warehouse,
+			"status": "Active",
+		}
+	)
+	doc.insert(ignore_permissions=True)
+	return doc
+
+
+def create_test_batch(item_code, **kwargs):
+	"""Create a Batch of `item_code` with a unique batch id."""
+	doc = frappe.get_doc(
+		{
+			"doctype": "Batch",
+			"batch_id": kwargs.pop("batch_id", f"_TPB{frappe.generate_hash()[:8].upper()}"),
+			"item": item_code,
+			**kwargs,
+		}
+	)
+	doc.insert(ignore_permissions=True)
+	return doc
+
+
+def create_test_stock_receipt(company, item_code, warehouse, qty, batch_no=None, rate=10):
+	"""Create and submit a Material Receipt of `qty` of `item_code`, into `batch_no` if given."""
+	stock_uom = frappe.db.get_value("Item", item_code, "stock_uom")
+	doc = frappe.get_doc(
+		{
+			"doctype": "Stock Entry",
+			"stock_entry_type": "Material Receipt",
+			"purpose": "Material Receipt",
+			"company": company,
+			"posting_date": nowdate(),
+			"items": [
+				{
+					"item_code": item_code,
+					"qty": qty,
+					"transfer_qty": qty,
+					"uom": stock_uom,
+					"stock_uom": stock_uom,
+					"conversion_factor": 1,
+					"t_warehouse": warehouse,
+					"basic_rate": rate,
+					"cost_center": get_cost_center(company),
+					"use_serial_batch_fields": 1 if batch_no else 0,
+					"batch_no": batch_no,
+				}
+			],
+		}
+	)
+	doc.insert(ignore_permissions=True)
+	doc.submit()
+	return doc
+
+
+def ensure_test_price_list(currency, price_list="_Test POSpire Selling"):
+	"""Return a selling Price List in `currency`, creating it if it does not exist."""
+	if frappe.db.exists("Price List", price_list):
+		return price_list
+
+	doc = frappe.get_doc(
+		{
+			"doctype": "Price List",
+			"price_list_name": price_list,
+			"currency": currency,
+			"selling": 1,
+			"enabled": 1,
+		}
+	)
+	doc.insert(ignore_permissions=True, ignore_if_duplicate=True)
+	return doc.name
+
+
+def create_test_item_price(item_code, price_list, rate, **kwargs):
+	"""Create a selling Item Price; `kwargs` set `uom`, `customer`, `valid_from` or `valid_upto`."""
+	if kwargs.get("uom"):
+		_ensure_uom(kwargs["uom"])
+	doc = frappe.get_doc(
+		{
+			"doctype": "Item Price",
+			"item_code": item_code,
+			"price_list": price_list,
+			"price_list_rate": rate,
+			"valid_from": kwargs.pop("valid_from", today()),
+			**kwargs,
+		}
+	)
+	doc.insert(ignore_permissions=True)
+	return doc
@@ -0,0 +1,146 @@
+// Offline invoice outbox, synced through sync_invoices in pospire/pospire/api/posapp.py
+
+const DB_NAME = "pospire_outbox";
+const STORE = "invoices";
+// Invoices per sync request, matches SYNC_BATCH_SIZE on the server
+const SYNC_BATCH = 50;
+// Rejections by the server before an invoice is left for the cashier to retry or discard
+const MAX_SYNC_ATTEMPTS = 5;
+
+let db_promise = null;
+let syncing = false;
+
+export function is_offline() {
+	return typeof navigator !== "undefined" && navigator.onLine === false;
+}
+
+// The request got no HTTP answer, as opposed to being rejected by the server
+export function is_network_error(xhr, text_status) {
+	return is_offline() || text_status === "timeout" || !xhr || !xhr.status;
+}
+
+function open_db() {
+	if (!db_promise) {
+		db_promise = new Promise((resolve, reject) => {
+			const request = indexedDB.open(DB_NAME, 1);
+			request.onupgradeneeded = () => {
+				request.result.createObjectStore(STORE, { keyPath: "client_id" });
+			};
+			request.onsuccess = () => resolve(request.result);
+			request.onerror = () => {
+				db_promise = null;
+				reject(request.error);
+			};
+		});
+	}
+	return db_promise;
+}
+
+// Run `fn(store)` in one transaction and resolve with its result once committed
+function with_store(mode, fn) {
+	return open_db().then(
+		(db) =>
+			new Promise((resolve, reject) => {
+				const tx = db.transaction(STORE, mode);
+				const result = fn(tx.objectStore(STORE));
+				tx.oncomplete = () =>
+					resolve(result && "result" in result ? result.result : result);
+				tx.onerror = () => reject(tx.error);
+				tx.onabort = () => reject(tx.error);
+			})
+	);
+}
+
+// Keep an invoice for checkout once the server is reachable; `client_id` is its request key
+export function add_invoice(client_id, invoice, data) {
+	const entry = {
+		client_id,
+		invoice,
+		data,
+		queued_at: Date.now(),
+		attempts: 0,
+		failed: false,
+		last_error: null,
+	};
+	return with_store("readwrite", (store) => store.put(JSON.parse(JSON.stringify(entry))));
+}
+
+export function get_invoices() {
+	return with_store("readonly", (store) => store.getAll()).then((entries) =>
+		(entries || []).sort((a, b) => a.queued_at - b.queued_at)
+	);
+}
+
+export function discard_invoice(client_id) {
+	return with_store("readwrite", (store) => store.delete(client_id));
+}
+
+// Give a failed invoice a new round of attempts, e.g. after fixing its cause on the server
+export function retry_invoice(client_id) {
+	return with_store("readwrite", (store) => {
+		const request = store.get(client_id);
+		request.onsuccess = () => {
+			if (request.result) {
+				store.put({ ...request.result, attempts: 0, failed: false });
+			}
+		};
+	});
+}
+
+// Resolves with the number of entries that ran out of attempts
+function apply_results(entries, results) {
+	const by_id = new Map(entries.map((entry) => [entry.client_id, entry]));
+	let failed = 0;
+	return with_store("readwrite", (store) => {
+		results.forEach((result) => {
+			const entry = by_id.get(result.client_id);
+			if (!entry) {
+				return;
+			}
+			if (result.status === "ok") {
+				store.delete(result.client_id);
+				return;
+			}
+			const attempts = (entry.attempts || 0) + 1;
+			failed += attempts >= MAX_SYNC_ATTEMPTS ? 1 : 0;
+			store.put({
+				...entry,
+				attempts,
+				failed: attempts >= MAX_SYNC_ATTEMPTS,
+				last_error: result.message,
+			});
+		});
+	}).then(() => failed);
+}
+
+// Send the pending entries in batches; resolves with the number submitted, and of
+// those that just ran out of attempts, so each failure is reported once
+export async function sync_outbox() {
+	const summary = { synced: 0, failed: 0 };
+	if (syncing || is_offline()) {
+		return summary;
+	}
+	syncing = true;
+	try {
+		const entries = (await get_invoices()).filter((entry) => !entry.failed);
+		for (let i = 0; i < entries.length; i += SYNC_BATCH) {
+			const batch = entries.slice(i, i + SYNC_BATCH);
+			const r = await frappe.call({
+				method: "pospire.pospire.api.posapp.sync_invoices",
+				args: {
+					invoices: batch.map(({ client_id, invoice, data }) => ({
+						client_id,
+						invoice,
+						data,
+					})),
+				},
+			});
+			const results = r.message || [];
+			summary.failed += await apply_results(batch, results);
+			summary.synced += results.filter((result) => result.status === "ok").length;
+		}
+	} finally {
+		syncing = false;
+	}
+	return summary;
+}
@@ -0,0 +1,86 @@
+// Columnar item payloads, see pospire/pospire/api/payload.py
+
+const PAYLOAD_FORMAT = "columns";
+const DICTIONARY_FIELDS = ["item_group", "brand", "stock_uom", "currency", "variant_of"];
+
+export const supports_gzip = typeof DecompressionStream !== "undefined";
+
+// Arguments asking the server for the compact format
+export function compact_args() {
+	return { compact: 1, compress: supports_gzip ? 1 : 0 };
+}
+
+function is_columns(payload) {
+	return payload && !Array.isArray(payload) && payload.format === PAYLOAD_FORMAT;
+}
+
+async function gunzip(data) {
+	const bytes = Uint8Array.from(atob(data), (c) => c.charCodeAt(0));
+	const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+	return new Response(stream).text();
+}
+
+// Rebuild row objects from a plain (not gzip encoded) columnar body
+export function decode_columns(payload) {
+	if (!is_columns(payload)) {
+		return payload || [];
+	}
+	const keys = Object.keys(payload.columns);
+	const columns = keys.map((key) => {
+		const values = payload.columns[key];
+		const dictionary = payload.dictionaries[key];
+		return dictionary ? values.map((v) => (v === null ? null : dictionary[v])) : values;
+	});
+	const rows = new Array(payload.length);
+	for (let i = 0; i < payload.length; i++) {
+		const row = {};
+		for (let k = 0; k < keys.length; k++) {
+			row[keys[k]] = columns[k][i];
+		}
+		rows[i] = row;
+	}
+	return rows;
+}
+
+// Decode any items payload returned by the server: rows, columns or gzip encoded columns
+export async function decode_items(payload) {
+	if (is_columns(payload) && payload.encoding === "gzip") {
+		payload = JSON.parse(await gunzip(payload.data));
+	}
+	return decode_columns(payload);
+}
+
+// Encode rows in the columnar format, used to keep localStorage copies small
+export function encode_items(rows) {
+	const columns = {};
+	rows.forEach((row) => {
+		Object.keys(row).forEach((key) => {
+			if (!columns[key]) {
+				columns[key] = [];
+			}
+		});
+	});
+	Object.keys(columns).forEach((key) => {
+		columns[key] = rows.map((row) => (row[key] === undefined ? null : row[key]));
+	});
+
+	const dictionaries = {};
+	DICTIONARY_FIELDS.forEach((key) => {
+		if (!columns[key]) {
+			return;
+		}
+		const index = new Map();
+		columns[key] = columns[key].map((v) => {
+			if (v === null) {
+				return null;
+			}
+			if (!index.has(v)) {
+				index.set(v, index.size);
+			}
+			return index.get(v);
+		});
+		dictionaries[key] = Array.from(index.keys());
+	});
+
+	return { format: PAYLOAD_FORMAT, length: rows.length, columns, dictionaries };
+}
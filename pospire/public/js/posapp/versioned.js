@@ -0,0 +1,11 @@
+// Version tokens for conditional fetches, see versioned() in pospire/pospire/api/cache.py
+
+export function stored_version(storage_key) {
+	return localStorage.getItem(`${storage_key}_version`) || "";
+}
+
+export function store_version(storage_key, version) {
+	try {
+		localStorage.setItem(`${storage_key}_version`, version);
+	} catch (e) {}
+}